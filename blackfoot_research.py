@@ -49,7 +49,8 @@ import time
 import locale
 import sys
 import optparse
-from researcher import ParserResearcher, Keeper, Log
+from researcher import ParserResearcher, Keeper, Normalizer, Log
+from compactparses import CompactParses
 import pprint
 from pprint import PrettyPrinter
 import random
@@ -195,11 +196,12 @@ class BlackfootParserResearcher(ParserResearcher):
         query = {'filter': ['and', conjuncts]}
         search = self.create_search(name, query)
         log.info(u'Form search "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record.update(search)
-        record['created'] = True
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record.update(search)
+            record['created'] = True
+            self.record[key][name] = record
+            self.dump_record()
         return search
 
     def create_words_search(self, force_recreate=False, **kwargs):
@@ -238,10 +240,11 @@ class BlackfootParserResearcher(ParserResearcher):
         query = {'filter': ['and', conjuncts]}
         search = self.create_search(name, query)
         log.info(u'Form search "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record['created'] = True
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record['created'] = True
+            self.record[key][name] = record
+            self.dump_record()
         return search
 
     # Corpus creation methods
@@ -261,11 +264,12 @@ class BlackfootParserResearcher(ParserResearcher):
         lexicon_search = self.create_lexicon_search(force_recreate)
         corpus = self.create_corpus(name, search_id=lexicon_search['id'])
         log.info(u'Corpus "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record['created'] = True
-        record.update(corpus)
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record['created'] = True
+            record.update(corpus)
+            self.record[key][name] = record
+            self.dump_record()
         return record
 
     def create_sentence_corpus(self, force_recreate=False):
@@ -282,10 +286,11 @@ class BlackfootParserResearcher(ParserResearcher):
         sentence_search = self.create_sentence_search(force_recreate)
         corpus = self.create_corpus(name, search_id=sentence_search['id'])
         log.info(u'Corpus "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record['created'] = True
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record['created'] = True
+            self.record[key][name] = record
+            self.dump_record()
         return corpus
 
     def create_analyzed_words_corpus(self, force_recreate=False, **kwargs):
@@ -328,10 +333,11 @@ class BlackfootParserResearcher(ParserResearcher):
         search_id = words_search['id']
         corpus = self.create_corpus(name, search_id=search_id)
         log.info(u'Corpus "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record['created'] = True
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record['created'] = True
+            self.record[key][name] = record
+            self.dump_record()
         return corpus
 
     def create_words_corpus(self, force_recreate=False, **kwargs):
@@ -354,10 +360,11 @@ class BlackfootParserResearcher(ParserResearcher):
         search_id = words_search['id']
         corpus = self.create_corpus(name, search_id=search_id)
         log.info(u'Corpus "%s" created.' % name)
-        record = self.record.get(key, {}).get(name, {})
-        record['created'] = True
-        self.record[key][name] = record
-        self.dump_record()
+        with self.record_lock:
+            record = self.record.get(key, {}).get(name, {})
+            record['created'] = True
+            self.record[key][name] = record
+            self.dump_record()
         return corpus
 
     # Corpus saving methods
@@ -366,6 +373,9 @@ class BlackfootParserResearcher(ParserResearcher):
     def save_words_corpus(self, force_recreate=False, **kwargs):
         """Create the corpus of words and pickle it locally.
 
+        Pass ``sync=True`` to patch an already saved local copy with the forms
+        that have changed on the OLD since it was saved.
+
         """
 
         corpus = self.create_words_corpus(force_recreate=force_recreate, **kwargs)
@@ -379,21 +389,23 @@ class BlackfootParserResearcher(ParserResearcher):
 
         record = self.record.get(key, {}).get(name, {})
         if record.get('saved_locally') and not force_recreate:
-            log.info(u'Corpus "%s" has already been saved locally.' % name)
+            if kwargs.get('sync'):
+                self.sync_corpus_words(record)
+            else:
+                log.info(u'Corpus "%s" has already been saved locally.' % name)
             return record
         else:
-            forms = self.get_corpus_forms(corpus)
-            form_quads = self.get_form_words(forms)
             file_path = os.path.join(self.localstore, key, filename)
-            cPickle.dump(form_quads, open(file_path, 'wb'))
+            self.save_corpus_words(corpus, file_path)
             assert os.path.isfile(file_path)
             corpus.update({
                 'saved_locally': True,
                 'local_copy_path': file_path
             })
-            record.update(corpus)
-            self.record[key][name] = record
-            self.dump_record()
+            with self.record_lock:
+                record.update(corpus)
+                self.record[key][name] = record
+                self.dump_record()
             log.info(u'Corpus "%s" has been saved locally.' % name)
             return record
 
@@ -414,21 +426,23 @@ class BlackfootParserResearcher(ParserResearcher):
 
         record = self.record.get(key, {}).get(name, {})
         if record.get('saved_locally') and not force_recreate:
-            log.info(u'Corpus "%s" has already been saved locally.' % name)
+            if kwargs.get('sync'):
+                self.sync_corpus_words(record)
+            else:
+                log.info(u'Corpus "%s" has already been saved locally.' % name)
             return record
         else:
-            forms = self.get_corpus_forms(corpus)
-            form_words = self.get_form_words(forms)
             file_path = os.path.join(self.localstore, key, filename)
-            cPickle.dump(form_words, open(file_path, 'wb'))
+            self.save_corpus_words(corpus, file_path)
             assert os.path.isfile(file_path)
             corpus.update({
                 'saved_locally': True,
                 'local_copy_path': file_path
             })
-            record.update(corpus)
-            self.record[key][name] = record
-            self.dump_record()
+            with self.record_lock:
+                record.update(corpus)
+                self.record[key][name] = record
+                self.dump_record()
             log.info(u'Corpus "%s" has been saved locally.' % name)
             return record
 
@@ -448,21 +462,23 @@ class BlackfootParserResearcher(ParserResearcher):
 
         record = self.record.get(key, {}).get(name, {})
         if record.get('saved_locally') and not force_recreate:
-            log.info(u'Corpus "%s" has already been saved locally.' % name)
+            if kwargs.get('sync'):
+                self.sync_corpus_words(record, filter_=True)
+            else:
+                log.info(u'Corpus "%s" has already been saved locally.' % name)
             return record
         else:
-            forms = self.get_corpus_forms(corpus)
-            form_words = self.get_form_words(forms, filter_=True)
             file_path = os.path.join(self.localstore, key, filename)
-            cPickle.dump(form_words, open(file_path, 'wb'))
+            self.save_corpus_words(corpus, file_path, filter_=True)
             assert os.path.isfile(file_path)
             corpus.update({
                 'saved_locally': True,
                 'local_copy_path': file_path
             })
-            record.update(corpus)
-            self.record[key][name] = record
-            self.dump_record()
+            with self.record_lock:
+                record.update(corpus)
+                self.record[key][name] = record
+                self.dump_record()
             log.info(u'Corpus "%s" has been saved locally.' % name)
             return record
 
@@ -1487,6 +1503,33 @@ class BlackfootParserResearcher(ParserResearcher):
         return self.create_corpus(name, content=content)
 
 
+    def count_well_analyzed_words(self, force_recreate=False, **kwargs):
+        """Count the tokens and types of the well analyzed words, and the tokens
+        of each category, from the local store of the well analyzed words corpus
+        (see ``save_well_analyzed_words_corpus``), without rescanning its forms.
+
+        The tokens are those of ``get_corpus_word_tokens``, i.e., lowercased and
+        screened as ``get_form_word_tokens`` does.
+
+        :returns: a dict with ``token_count``, ``type_count`` and
+            ``category_counts`` (a dict from categories to token counts) values.
+
+        """
+
+        record = self.save_well_analyzed_words_corpus(force_recreate=force_recreate, **kwargs)
+        word_tokens = self.get_corpus_word_tokens(record, filter_=True)
+        category_counts = {}
+        for tr, mb, mg, sc in word_tokens:
+            category_counts[sc] = category_counts.get(sc, 0) + 1
+        counts = {
+            'token_count': len(word_tokens),
+            'type_count': len(set(word_tokens)),
+            'category_counts': category_counts
+        }
+        log.info(u'There are %d well analyzed word tokens and %d types.' % (
+            counts['token_count'], counts['type_count']))
+        return counts
+
     def get_well_analyzed_words(self, force_recreate=False, **kwargs):
         """Find all of the well analyzed words in the database and do stuff with them ...
 
@@ -1497,7 +1540,8 @@ class BlackfootParserResearcher(ParserResearcher):
         3. Get a list of well analyzed word types with a unique most common
            analysis; this is the "gold standard" that the ideal parser will encode. - CHECK
 
-        4. Create a pickle file containing the gold standard
+        4. Create a pickle file containing the gold standard (see
+           ``create_gold_folds``, which builds it and its folds locally)
 
         5. Create a new form object in the database for each well analyzed word
            type and tag each of these form objects as a "well analyzed word". - CHECK
@@ -1860,9 +1904,45 @@ class BlackfootParserResearcher(ParserResearcher):
         print 'There are %d well analyzed word forms are now in the database' % len(waws)
 
 
+    # The relation-scoped corpora: the 5 largest enterer-defined corpora, the 5 largest
+    # elicitor-defined, 3 speaker-defined, 2 dialect-defined, 3 source-defined
+    # (including Weber 2013).
+    corpus_relations = {
+        'enterer': (
+            ('last_name', 'Dunham'),
+            ('last_name', 'Hanson'),
+            ('last_name', 'Johansson'),
+            ('last_name', 'Marshall'),
+            ('last_name', 'Meadows')),
+        'elicitor': (
+            ('last_name', 'Bliss'),
+            ('last_name', 'Dunham'),
+            ('last_name', 'Johansson'),
+            ('last_name', 'Louie'),
+            ('last_name', 'Wiltschko')),
+        'speaker': (
+            ('last_name', 'Bullshields'),
+            ('last_name', 'Ermineskin'),
+            ('last_name', 'Breaker'),
+            ('dialect', u'Siksika\u0301'),
+            ('dialect', 'Kainai')),
+        'source': (
+            ('author', 'Donald Frantz'),
+            ('author', 'Natalie Weber'), # Weber (2013); see add_weber
+            ('id', '3'), # Frantz & Russell (1995)
+            ('id', '14')) # Frantz (2009)
+    }
+
     def create_corpora(self, force_recreate=False, **kwargs):
         """Create a bunch of corpora and pickle them locally.
 
+        :param bool kwargs['relations']: if ``True``, the relation-scoped
+            corpora of ``corpus_relations`` are created along with the main one.
+        :param int kwargs['max_workers']: the maximum number of corpora created
+            concurrently; see ``materialize_corpora``.
+
+        All of the corpora are built as a single parallel batch.
+
         .. note::
 
             I have commented out the commands to create the "words" and "analyzed words" copora,
@@ -1871,65 +1951,59 @@ class BlackfootParserResearcher(ParserResearcher):
         """
 
         log.info(u'Creating corpora.')
-        corpora = {}
 
-        # Create the three main corpora.
-        #words_corpus = self.save_words_corpus(force_recreate=force_recreate)
-        #analyzed_words_corpus = self.save_analyzed_words_corpus(
-        #    force_recreate=force_recreate)
-        well_analyzed_words_corpus = self.save_well_analyzed_words_corpus(
-            force_recreate=force_recreate)
+        # The main corpus has no relation.
+        specs = [{}]
+        if kwargs.get('relations'):
+            for relation, attribute_values in sorted(self.corpus_relations.items()):
+                for attribute, value in attribute_values:
+                    specs.append({'relation': relation, 'attribute': attribute,
+                                  'value': value})
 
-        #corpora[words_corpus['name']] = words_corpus
-        #corpora[analyzed_words_corpus['name']] = analyzed_words_corpus
-        corpora[well_analyzed_words_corpus['name']] = well_analyzed_words_corpus
-        
-        """
-
-        # Create a corpus of well-analyzed words from Weber 2013.
-        researcher.create_weber_2013_well_analyzed_words_corpus(force_recreate=True)
-
-        # Create 17 additional corpora. The 5 largest enterer-defined corpora, the 5 largest
-        # elicitor-defined, 3 speaker-defined, 2 dialect-defined, 2 source-defined.
-        relations = {
-            'enterer': (
-                ('last_name', 'Dunham'),
-                ('last_name', 'Hanson'),
-                ('last_name', 'Johansson'),
-                ('last_name', 'Marshall'),
-                ('last_name', 'Meadows')),
-            'elicitor': (
-                ('last_name', 'Bliss'),
-                ('last_name', 'Dunham'),
-                ('last_name', 'Johansson'),
-                ('last_name', 'Louie'),
-                ('last_name', 'Wiltschko')),
-            'speaker': (
-                ('last_name', 'Bullshields'),
-                ('last_name', 'Ermineskin'),
-                ('last_name', 'Breaker'),
-                ('dialect', u'Siksika\u0301'),
-                ('dialect', 'Kainai')),
-            'source': (
-                ('author', 'Donald Frantz'),
-                ('id', '3'), # Frantz & Russell (1995)
-                ('id', '14')) # Frantz (2009)
-        }
-        for relation, attribute_values in relations.items():
-            for attribute, value in attribute_values:
-                #corpus = self.save_words_corpus(
-                #    force_recreate=force_recreate, relation=relation, attribute=attribute, value=value)
-                #corpora[corpus['name']] = corpus
+        #self.materialize_corpora(self.save_words_corpus, specs, force_recreate=force_recreate)
+        #self.materialize_corpora(self.save_analyzed_words_corpus, specs, force_recreate=force_recreate)
+        return self.materialize_corpora(self.save_well_analyzed_words_corpus, specs,
+            max_workers=kwargs.get('max_workers', 4), force_recreate=force_recreate)
+
+    def create_gold_folds(self, force_recreate=False, **kwargs):
+        """Build the gold standard from the local well analyzed words corpus and
+        split it into seeded training/test folds.
 
-                #corpus = self.save_analyzed_words_corpus(
-                #    force_recreate=force_recreate, relation=relation, attribute=attribute, value=value)
-                #corpora[corpus['name']] = corpus
+        :param int kwargs['k']: the number of folds; defaults to 5.
+        :param int kwargs['seed']: the seed of the shuffle; defaults to 0.
+        :param bool kwargs['push']: if ``True``, the folds are also created as
+            corpora on the OLD, as lists of the ids of the forms in the
+            "unique well-analyzed word" corpus (see ``get_well_analyzed_words``).
+        :returns: a 2-tuple: the gold standard list of (tr, mb, mg, cat) words
+            and the list of ``(training, test)`` folds.
+
+        The same corpus, ``k`` and ``seed`` always yield the same folds, so they
+        can be rebuilt locally instead of stored on the OLD.
 
-                corpus = self.save_well_analyzed_words_corpus(
-                    force_recreate=force_recreate, relation=relation, attribute=attribute, value=value)
-                corpora[corpus['name']] = corpus
         """
-        return corpora
+
+        k = kwargs.get('k', 5)
+        seed = kwargs.get('seed', 0)
+        record = self.save_well_analyzed_words_corpus(force_recreate=force_recreate)
+        store = self.require_saved_corpus_store(record)
+        try:
+            gold, folds = store.gold_folds(k, seed)
+        finally:
+            store.close()
+        log.info(u'There are %d gold words in %d folds (seed %s).' % (len(gold), k, seed))
+        if kwargs.get('push'):
+            corpus_name = u'Corpus where each form is a representation of a unique well-analyzed word'
+            corpus = [c for c in self.old.get('corpora') if c['name'] == corpus_name][0]
+            file_path = os.path.join(self.localstore, 'corpora', u'well_analyzed_word_types.pickle')
+            self.save_corpus_words(corpus, file_path, filter_=True)
+            store = self.open_corpus_store(file_path)
+            try:
+                form_ids = dict((word, min(store.form_ids(word))) for word in gold
+                                if store.count(word))
+            finally:
+                store.close()
+            self.push_folds(u'Gold seed %s' % seed, folds, form_ids)
+        return gold, folds
 
     def get_corpora_locally(self, force_recreate=False, **kwargs):
         """Get the following corpora and save them locally.
@@ -1950,13 +2024,14 @@ class BlackfootParserResearcher(ParserResearcher):
             name = corpus['name']
             record = self.record.get(key, {}).get(name, {})
             if record.get('saved_locally') and not force_recreate:
-                log.info(u'Corpus "%s" has already been saved locally.' % name)
+                if kwargs.get('sync'):
+                    self.sync_corpus_words(record, filter_=True)
+                else:
+                    log.info(u'Corpus "%s" has already been saved locally.' % name)
                 corpora[name] = record
             else:
-                forms = self.get_corpus_forms(corpus)
-                form_words = self.get_form_words(forms, filter_=True)
                 file_path = os.path.join(self.localstore, key, filename)
-                cPickle.dump(form_words, open(file_path, 'wb'))
+                self.save_corpus_words(corpus, file_path, filter_=True)
                 assert os.path.isfile(file_path)
                 corpus.update({
                     'saved_locally': True,
@@ -1970,6 +2045,11 @@ class BlackfootParserResearcher(ParserResearcher):
         log.info(u'Done getting gold test set corpora locally.')
         return corpora
 
+    # Unwanted characters (mainly punctuation) can be removed and the resulting
+    # transcription should still be parseable.
+    unwanted_unichrs = u'_"?(),#;:!.^&@$/*\u2018\u201C\u201D\u2026'
+    unwanted_table = dict((ord(unichr), None) for unichr in unwanted_unichrs)
+
     def remove_unwanted_characters(self, unistr):
         """Unwanted characters (mainly punctuation) can be removed and the resulting
         transcription should still be parseable.
@@ -1982,9 +2062,7 @@ class BlackfootParserResearcher(ParserResearcher):
 
         """
 
-        unwanted_unichrs = u'_"?(),#;:!.^&@$/*\u2018\u201C\u201D\u2026'
-        translate_table = dict((ord(unichr), u'') for unichr in unwanted_unichrs)
-        return unistr.translate(translate_table)
+        return unistr.translate(self.unwanted_table)
 
     def remove_deal_breakers_deprecated(self, unistr):
         """The presence of these characters in a transcription signifies that it is unparseable.
@@ -2011,10 +2089,26 @@ class BlackfootParserResearcher(ParserResearcher):
     orthography = u"ptkmnsywhaio\u0301'"
     remove_deal_breakers = Keeper(orthography)
 
+    # ``clean_transcription`` compiled: lowercase, remove the unwanted
+    # characters and replace right single quotation marks with apostrophes in
+    # one translate pass, then remove doubled apostrophes.
+    normalize = Normalizer(lower=True, delete=unwanted_unichrs,
+        translate={u'\u2019': u"'"}, substitutions=[(u"''", u'')])
+    clean_version = normalize.version
+
+    # The parsed transcriptions have been cleaned (so lowercased) and contain
+    # only ``orthography`` characters, so the base class's ``'lowercase'`` and
+    # ``'punctuation'`` fallbacks would change nothing (or, for the latter,
+    # delete glottal stops); fallbacks must be given as ``(name, function)``.
+    fallback_normalizations = {}
+
     def clean_transcription(self, transcription):
 
-        return self.remove_unwanted_characters(transcription.lower()).\
-            replace(u'\u2019', u"'").replace(u"''", u'')
+        return self.normalize(transcription)
+
+    def clean_transcriptions(self, transcriptions):
+
+        return self.normalize.normalize_all(transcriptions)
 
     def clean_corpus(self, corpus):
         """Clean up the word transcriptions in the corpus and return a list of all unique.
@@ -2028,25 +2122,43 @@ class BlackfootParserResearcher(ParserResearcher):
 
         """
 
-        transcriptions = set()
-        for transcription, m, g, c in corpus:
-            cleaned_transcription = self.clean_transcription(transcription)
-            if self.remove_deal_breakers(cleaned_transcription) == cleaned_transcription:
-                transcriptions.add(cleaned_transcription)
-        return list(transcriptions)
+        transcriptions = set(self.clean_transcriptions(set(t for t, m, g, c in corpus)))
+        return [t for t in transcriptions if self.remove_deal_breakers(t) == t]
 
 
-    def parse_corpus(self, parser, corpus, batch_size=0, preflight=lambda x: x):
+    def parse_corpus(self, parser, corpus, batch_size=0, preflight=None, sample=None,
+                     workers=1, stream=False, max_candidates=10, truncate=False, fallbacks=None,
+                     report=None, time_budget=None, candidate_limit=None, remote=False,
+                     concurrency=4, compact=False, server_compile_attempt=None):
         """Parse all of the transcriptions in the locally saved corpus using the
         locally saved parser.
 
+        For quick iterations, pass a ``sample`` such as
+        ``{'size': 300, 'stratify': 'category'}``; see ``load_corpus_list``.
+        If ``stream`` is ``True``, the parses are returned as the generator of
+        ``iter_parse``. For ``max_candidates`` and ``truncate``, see ``iter_parse``;
+        e.g., with overgenerating phonologies (``create_phonology_4``),
+        ``truncate=True`` ranks only the first ``max_candidates`` candidates of
+        each word (which saves ranking time, not apply-up time), and words
+        that explode its ``misspell`` rule can be given up on with a
+        ``time_budget`` (in seconds per word) or a ``candidate_limit``.
+        Parsers that have not been exported can be evaluated on the server
+        with ``remote=True``, and with ``remote='auto'`` the local and remote
+        parsers share the work. With ``compact=True``, the parses of a big
+        corpus are held in a ``CompactParses`` container.
+
+        Words that fail to parse can be retried under ``fallbacks``
+        normalizations, e.g., ``[('flattened', flattener)]``; see
+        ``iter_parse_with_fallbacks``. The fallbacks apply to the cleaned
+        transcriptions, which are already lowercase.
+
         Ideas for improving performance:
 
-        1. allow parser to attempt a parse on ``transcription.lower()`` if
-           parse on ``transcription`` returns ``None``. Make this toggleable at
-           the parse interface level.  This could also be implemented in the
-           phonology for cases where the orthography makes segmental use of
-           uppercase characters.
+        1. DONE: allow parser to attempt a parse on ``transcription.lower()`` if
+           parse on ``transcription`` returns ``None`` (done by
+           ``clean_transcription``, before parsing). This could also be
+           implemented in the phonology for cases where the orthography makes
+           segmental use of uppercase characters.
 
         2. make sure that unicode normalization is not fucking up local
            parsing! A possibility is that unicode->JSON->unicode conversion is
@@ -2055,30 +2167,26 @@ class BlackfootParserResearcher(ParserResearcher):
         3.
 
         """
-        #batch_size = 1 # DELETE ME, I AM FOR TESTING !!!
-        batch_size = 20 # DELETE ME, I AM FOR TESTING !!!
-
-
         print 'in parse_corpus in blackfoot_research.py'
-        corpus_list = cPickle.load(open(corpus['local_copy_path'], 'rb'))
-        #corpus_list = [(preflight(t), m, g, c) for t, m, g, c in corpus_list[:100]] # WARNING: remove the 100 cap!
-        corpus_list = [(preflight(t), m, g, c) for t, m, g, c in corpus_list] # WARNING: remove the 100 cap!
+        corpus_list = self.load_corpus_list(corpus, sample)
+        if preflight:
+            corpus_list = [(preflight(t), m, g, c) for t, m, g, c in corpus_list]
         transcriptions = self.clean_corpus(corpus_list)
         log.info('About to parse all %s unique transcriptions in corpus "%s".' % (
             len(transcriptions), corpus['name']))
+        parses = self.iter_parse_with_fallbacks(parser, transcriptions, fallbacks or (), report,
+            batch_size=batch_size, workers=workers, max_candidates=max_candidates,
+            truncate=truncate, time_budget=time_budget, candidate_limit=candidate_limit,
+            remote=remote, concurrency=concurrency,
+            server_compile_attempt=server_compile_attempt)
+        if stream:
+            return parses, corpus_list
         start_time = time.time()
-        transcriptions = transcriptions
-        parses = self.parse_locally(parser, transcriptions, batch_size)
-
-        """
-        # Attempt conversion to lowercase to get more parses
-        unparsed_lc = list(set([t.lower() for t, p in parses.iteritems() if not p.parse]))
-        if unparsed_lc:
-            parses_lc = self.parse_locally(parser, unparsed_lc)
-            for transcription, parse in parses.iteritems():
-                if not parse.parse:
-                    parses[transcription] = parses_lc.get(transcription.lower(), parse)
-        """
+        if compact:
+            parses = CompactParses.from_parses(parses, self.get_parse_string_reader(parser))
+        else:
+            parses = dict((transcription, (parse, candidates))
+                          for transcription, parse, candidates in parses)
 
         end_time = time.time()
         log.info('Time elapsed: %s' % self.old.human_readable_seconds(end_time - start_time))
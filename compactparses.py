@@ -0,0 +1,224 @@
+#!/home/joel/env/bin/python
+# coding=utf8
+
+# Copyright 2013 Joel Dunham
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Compact Parses --- parse results of large corpora in a small amount of memory.
+
+The primary class defined here is CompactParses, a container of the
+``(Parse, candidates)`` results of many transcriptions that stores each parse
+as a sequence of interned morpheme ids in flat arrays, instead of as a
+``Parse`` instance per parse. Results are rebuilt, as ``RemoteParse``
+instances or as the parse module's own ``Parse`` instances, when they are read.
+
+"""
+
+from array import array
+
+
+class CompactParses(object):
+    """The parses and candidates of a set of transcriptions.
+
+    Each distinct morpheme (i.e., each rare-delimited shape, gloss and category
+    string) and morpheme delimiter is stored once and given an id; a parse is
+    a run of ids in the ``ids`` array, delimited by ``parse_offsets``. The
+    parses of a transcription are consecutive: its ``candidate_counts``
+    candidates and then, unless the best parse is one of them, the best
+    parse. ``best`` holds the position of the best parse among them, or -1 if
+    the transcription has no parse.
+
+    The class is a read-only mapping like the ``{transcription: (parse,
+    candidates)}`` dicts returned by ``ParserResearcher.parse_locally``: it
+    has ``keys``, ``values``, ``items`` and their ``iter*`` versions, and
+    iterating over it yields the transcriptions. The values are built on
+    access. ``iter_triples`` yields ``(transcription, parse, candidates)``
+    triples instead, as ``ParserResearcher.iter_parse`` does.
+
+    :param reader: a ``ParseStringReader`` for the parser's parse strings.
+
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.tokens = []            # morphemes and delimiters, by id
+        self.token_ids = {}
+        self.ids = array('i')
+        self.parse_offsets = array('l', [0])
+        self.transcriptions = []
+        self.indices = {}           # transcriptions to their positions
+        self.word_offsets = array('l', [0]) # the first parse of each transcription
+        self.candidate_counts = array('i')
+        self.best = array('i')
+        self.timeouts = {}          # transcriptions given up on, to their ``ParseTimeout``
+
+    @classmethod
+    def from_parses(cls, parses, reader):
+        """Return the ``CompactParses`` of ``parses``, a dict from transcriptions to
+        ``(Parse, candidates)`` pairs or an iterable of ``(transcription, Parse,
+        candidates)`` triples.
+
+        """
+
+        compact = cls(reader)
+        if hasattr(parses, 'iteritems'):
+            parses = ((transcription, parse, candidates) for transcription,
+                      (parse, candidates) in parses.iteritems())
+        for transcription, parse, candidates in parses:
+            compact.add(transcription, parse, candidates)
+        return compact
+
+    def intern(self, token):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def add_parse_string(self, parse_string):
+        self.ids.extend(self.intern(token)
+                        for token in self.reader.splitter.split(parse_string))
+        self.parse_offsets.append(len(self.ids))
+
+    def get_parse_string(self, parse_index):
+        return u''.join(self.tokens[token_id] for token_id in self.ids[
+            self.parse_offsets[parse_index]:self.parse_offsets[parse_index + 1]])
+
+    def add(self, transcription, parse, candidates):
+        """Store the ``parse`` and ``candidates`` of ``transcription``, which must
+        not have been added before (a ``ValueError`` is raised if it has). The
+        parses may be ``Parse`` or ``RemoteParse`` instances.
+
+        """
+
+        if transcription in self.indices:
+            raise ValueError(u'The parses of %s have already been added.' % transcription)
+        self.indices[transcription] = len(self.transcriptions)
+        self.transcriptions.append(transcription)
+        if getattr(parse, 'timed_out', False):
+            self.timeouts[transcription] = parse
+        candidate_strings = [candidate.parse for candidate in candidates]
+        for candidate_string in candidate_strings:
+            self.add_parse_string(candidate_string)
+        best = -1
+        if parse.parse:
+            try:
+                best = candidate_strings.index(parse.parse)
+            except ValueError:
+                best = len(candidate_strings)
+                self.add_parse_string(parse.parse)
+        self.word_offsets.append(len(self.parse_offsets) - 1)
+        self.candidate_counts.append(len(candidate_strings))
+        self.best.append(best)
+
+    def update(self, parses):
+        for transcription, (parse, candidates) in parses.iteritems():
+            self.add(transcription, parse, candidates)
+
+    def get_strings(self, transcription):
+        """Return the parse string (or ``None``) and the candidate parse strings
+        of ``transcription``.
+
+        """
+
+        index = self.indices[transcription]
+        first = self.word_offsets[index]
+        candidates = [self.get_parse_string(first + position)
+                      for position in xrange(self.candidate_counts[index])]
+        best = self.best[index]
+        if best == -1:
+            return None, candidates
+        if best < len(candidates):
+            return candidates[best], candidates
+        return self.get_parse_string(first + best), candidates
+
+    def __getitem__(self, transcription):
+        """Return the ``(RemoteParse, candidates)`` pair of ``transcription``.
+
+        """
+
+        parse_string, candidate_strings = self.get_strings(transcription)
+        if transcription in self.timeouts:
+            parse = self.timeouts[transcription]
+        else:
+            parse = self.reader.read(parse_string)
+        return parse, map(self.reader.read, candidate_strings)
+
+    def get(self, transcription, default=None):
+        if transcription not in self.indices:
+            return default
+        return self[transcription]
+
+    def to_parses(self, transcription, parser):
+        """Return the ``(Parse, candidates)`` pair of ``transcription``, as
+        instances of the ``Parse`` class of the parse module whose ``parser``
+        object is given.
+
+        """
+
+        parse, candidates = self[transcription]
+        to_parse = lambda remote_parse: parser.get_parse_object(remote_parse.triplet)
+        if parse.parse:
+            parse = to_parse(parse)
+        return parse, map(to_parse, candidates)
+
+    def __contains__(self, transcription):
+        return transcription in self.indices
+
+    def __len__(self):
+        return len(self.transcriptions)
+
+    def __iter__(self):
+        return iter(self.transcriptions)
+
+    iterkeys = __iter__
+
+    def keys(self):
+        return list(self.transcriptions)
+
+    def itervalues(self):
+        for transcription in self.transcriptions:
+            yield self[transcription]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def iteritems(self):
+        for transcription in self.transcriptions:
+            yield transcription, self[transcription]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def iter_triples(self):
+        """Yield a ``(transcription, parse, candidates)`` triple per transcription,
+        in the order in which they were added.
+
+        """
+
+        for transcription in self.transcriptions:
+            parse, candidates = self[transcription]
+            yield transcription, parse, candidates
+
+    @property
+    def size(self):
+        """The approximate number of bytes used by the arrays and the interned
+        strings.
+
+        """
+
+        arrays = (self.ids, self.parse_offsets, self.word_offsets, self.candidate_counts,
+                  self.best)
+        return (sum(len(a) * a.itemsize for a in arrays) +
+                sum(len(token) * 2 + 50 for token in self.tokens))
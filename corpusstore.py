@@ -0,0 +1,742 @@
+#!/home/joel/env/bin/python
+# coding=utf8
+
+# Copyright 2013 Joel Dunham
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Corpus Store --- local, incrementally updatable copies of OLD corpora.
+
+The primary class defined here is CorpusStore, which persists the words of an
+OLD corpus form by form so that a locally saved corpus can be patched in place
+when forms are modified or deleted on the server, instead of being downloaded
+again in its entirety.
+
+"""
+
+import cPickle
+import hashlib
+import math
+import os
+import random
+import re
+import shelve
+
+
+class CorpusStore(object):
+    """A directory holding the words of an OLD corpus, keyed by form id.
+
+    The directory contains:
+
+    - ``forms.db``: a shelf from form ids to ``(datetime_modified, words)``
+      pairs, where ``words`` is a tuple of (tr, mb, mg, cat) quadruples;
+    - ``meta.pickle``: the ``types`` dict, which maps each unique word to a
+      ``[count, form_ids]`` pair, i.e., its token count and the set of ids of
+      the forms it occurs in; also the newest ``datetime_modified`` value
+      seen, the ``filter_`` value used when extracting words from forms, the
+      ``clean_version`` the ``cleaned_transcription`` index was built with and
+      the Merkle summary of the words (see below);
+    - ``index_<name>.db``: once ``build_indexes`` has been called, one shelf
+      per name in ``index_names``, each an inverted index from keys to the
+      sorted list of unique words having that key. The indexes are kept up
+      to date as forms are added and removed;
+    - ``versions/``: the snapshots of the Merkle summary, one per saved
+      revision, used by ``diff``. Only those of the ``kept_revisions`` most
+      recently saved revisions are kept;
+    - ``saved``: an empty marker file, written last by ``save`` and removed
+      as soon as the store is changed, so a store whose save or sync was
+      interrupted is not mistaken for a complete one (see ``is_saved``).
+
+    The sorted list of unique words that the rest of the researcher works with
+    (i.e., the corpus' ``local_copy_path`` pickle) is written by ``save``.
+
+    Both the type view (``words``) and the token view (``tokens``) of the
+    corpus, as well as token counts (``count``, ``transcription_counts``), are
+    read off of ``types`` without rescanning the forms.
+
+    Each word type has a content hash (of the word and its token count) and
+    falls into one of ``bucket_count`` buckets according to the hash of the
+    word alone. A bucket's hash is the hash of its sorted word hashes and the
+    store's ``revision`` is the hash of its bucket hashes. Only the buckets of
+    words touched since the last save are rehashed, the revision is the same
+    whenever the words and counts are, and two revisions are diffed by
+    comparing only the words of the buckets whose hashes differ.
+
+    :param str path: the directory of the store; it must exist.
+    :param function clean: maps transcriptions to the keys of the
+        ``cleaned_transcription`` index, e.g., ``ParserResearcher.clean_transcription``.
+    :param clean_version: identifies the behaviour of ``clean``, e.g.,
+        ``Normalizer.version``; if it differs from the one the
+        ``cleaned_transcription`` index was built with, the index is rebuilt
+        when the store is opened.
+    :param unicode delimiters: the morpheme delimiters used to split the
+        morpheme break and gloss values into the keys of the ``morpheme`` and
+        ``gloss`` indexes.
+
+    """
+
+    index_names = ('transcription', 'cleaned_transcription', 'morpheme',
+                   'category', 'gloss')
+
+    def __init__(self, path, clean=None, delimiters=u'-=', clean_version=None):
+        self.path = path
+        self.clean = clean or (lambda x: x)
+        self.clean_version = clean_version
+        self.splitter = re.compile(u'[%s]' % re.escape(delimiters))
+        self.meta_path = os.path.join(path, 'meta.pickle')
+        self.forms = shelve.open(os.path.join(path, 'forms.db'),
+                                 protocol=cPickle.HIGHEST_PROTOCOL)
+        try:
+            self.meta = cPickle.load(open(self.meta_path, 'rb'))
+        except Exception:
+            self.meta = self.default_meta()
+        self.indexes = {}
+        self.touched = set()
+        self.saved = self.is_saved(path)
+        if self.meta.get('version') != self.version:
+            self.rebuild_types()
+        if self.meta['indexed'] and self.meta.get('clean_version') != clean_version:
+            self.build_index('cleaned_transcription')
+            self.meta['clean_version'] = clean_version
+            self.save()
+
+    # Incremented whenever the format of ``meta.pickle`` changes.
+    version = 3
+
+    bucket_count = 256
+
+    # The number of most recently saved revisions that can be diffed against.
+    kept_revisions = 8
+
+    @staticmethod
+    def is_saved(path):
+        """Return ``True`` if the store at ``path`` exists and was left in a
+        consistent state, i.e., it has not been changed since it was last saved.
+        Unlike opening the store, this creates nothing.
+
+        """
+
+        return os.path.isfile(os.path.join(path, 'saved'))
+
+    def mark_unsaved(self):
+        if self.saved:
+            os.remove(os.path.join(self.path, 'saved'))
+            self.saved = False
+
+    def default_meta(self):
+        return {
+            'version': self.version,
+            'newest_modified': None,
+            'filter_': False,
+            'indexed': False,
+            'clean_version': None,
+            'revision': None,
+            'previous_revision': None,
+            'revisions': [], # the most recently saved revisions, oldest first
+            'hashes': [{} for i in range(self.bucket_count)], # per bucket, words to hashes
+            'bucket_hashes': [None] * self.bucket_count,
+            'types': {}     # (tr, mb, mg, cat) quadruples to [count, form_ids] pairs
+        }
+
+    def rebuild_types(self):
+        """Recompute ``types`` from the forms shelf, e.g., after a format change.
+
+        """
+
+        types = {}
+        for form_id, (datetime_modified, words) in self.forms.iteritems():
+            for word in words:
+                entry = types.setdefault(word, [0, set()])
+                entry[0] += 1
+                entry[1].add(int(form_id))
+        default_meta = self.default_meta()
+        for key in default_meta:
+            self.meta.setdefault(key, default_meta[key])
+        self.meta['types'] = types
+        self.meta['version'] = self.version
+        self.meta['hashes'] = default_meta['hashes']
+        self.meta['revision'] = None
+        self.touched = set(types)
+
+    @property
+    def newest_modified(self):
+        """The newest ``datetime_modified`` value of any form in the store.
+
+        OLD datetimes are ISO 8601 strings, so they compare correctly as strings.
+
+        """
+
+        return self.meta['newest_modified']
+
+    def __contains__(self, form_id):
+        return str(form_id) in self.forms
+
+    def __len__(self):
+        return len(self.forms)
+
+    def form_id_set(self):
+        """Return the set of the (integer) ids of the forms in the store.
+
+        """
+
+        return set(int(form_id) for form_id in self.forms.iterkeys())
+
+    def get_modified(self, form_id):
+        """Return the stored ``datetime_modified`` value of form ``form_id``, or
+        ``None`` if the form is not in the store.
+
+        """
+
+        entry = self.forms.get(str(form_id))
+        return entry and entry[0]
+
+    def clear(self, filter_=False):
+        """Remove all forms and words from the store.
+
+        """
+
+        self.mark_unsaved()
+        self.forms.clear()
+        for name in self.index_names:
+            self.get_index(name, 'n')
+        revision = self.meta.get('revision')
+        revisions = self.meta.get('revisions', [])
+        self.meta = self.default_meta()
+        self.meta['filter_'] = filter_
+        # Keep the old revisions so that a re-save can be diffed against them.
+        self.meta['revision'] = revision
+        self.meta['revisions'] = revisions
+        self.touched = set()
+
+    def add_form(self, form_id, datetime_modified, words):
+        """Add (or replace) the words of form ``form_id``.
+
+        :param int form_id: the ``id`` value of the form.
+        :param unicode datetime_modified: the form's ``datetime_modified`` value.
+        :param iterable words: the (tr, mb, mg, cat) word tokens of the form.
+
+        """
+
+        form_id = int(form_id)
+        self.mark_unsaved()
+        if form_id in self:
+            self.remove_form(form_id)
+        words = tuple(words)
+        self.touched.update(words)
+        self.forms[str(form_id)] = (datetime_modified, words)
+        types = self.meta['types']
+        for word in words:
+            entry = types.get(word)
+            if entry is None:
+                entry = types[word] = [0, set()]
+                if self.meta['indexed']:
+                    self.index_word(word)
+            entry[0] += 1
+            entry[1].add(form_id)
+        if datetime_modified > self.meta['newest_modified']:
+            self.meta['newest_modified'] = datetime_modified
+
+    def remove_form(self, form_id):
+        """Remove the words of form ``form_id`` from the store.
+
+        """
+
+        form_id = int(form_id)
+        self.mark_unsaved()
+        datetime_modified, words = self.forms.pop(str(form_id))
+        self.touched.update(words)
+        types = self.meta['types']
+        for word in words:
+            entry = types[word]
+            entry[0] -= 1
+            entry[1].discard(form_id)
+            if not entry[0]:
+                del types[word]
+                if self.meta['indexed']:
+                    self.unindex_word(word)
+
+    def words(self):
+        """Return a sorted list of the unique words (i.e., the word types) in the store.
+
+        """
+
+        return sorted(self.meta['types'])
+
+    def tokens(self):
+        """Yield every word token in the store, in sorted order.
+
+        """
+
+        types = self.meta['types']
+        for word in sorted(types):
+            for i in xrange(types[word][0]):
+                yield word
+
+    def word_counts(self):
+        """Return a sorted list of (word, token count) pairs.
+
+        """
+
+        return sorted((word, count) for word, (count, form_ids)
+                      in self.meta['types'].iteritems())
+
+    def count(self, word):
+        """Return the number of tokens of ``word`` in the store.
+
+        """
+
+        return self.meta['types'].get(word, (0,))[0]
+
+    def form_ids(self, word):
+        """Return the sorted ids of the forms that ``word`` occurs in.
+
+        """
+
+        return sorted(self.meta['types'].get(word, (0, ()))[1])
+
+    def transcription_counts(self, normalize=None):
+        """Return a dict from transcriptions to token counts, summed over analyses.
+
+        :param function normalize: if supplied, it is applied to each
+            transcription and the counts of transcriptions that are normalized
+            to the same value are summed.
+
+        """
+
+        counts = {}
+        for (tr, mb, mg, cat), (count, form_ids) in self.meta['types'].iteritems():
+            if normalize:
+                tr = normalize(tr)
+            counts[tr] = counts.get(tr, 0) + count
+        return counts
+
+    def get_index_keys(self, word):
+        """Return a dict from index names to the keys of ``word`` in each index.
+
+        """
+
+        tr, mb, mg, cat = word
+        keys = {
+            'transcription': [tr],
+            'cleaned_transcription': [self.clean(tr)]
+        }
+        if mb:
+            keys['morpheme'] = set(filter(None, self.splitter.split(mb)))
+        if mg:
+            keys['gloss'] = set(filter(None, self.splitter.split(mg)))
+        if cat:
+            keys['category'] = [cat]
+        return keys
+
+    def get_index(self, name, flag='c'):
+        """Return the shelf of the index ``name``, opening it if necessary.
+
+        """
+
+        if flag == 'n' and name in self.indexes:
+            self.indexes.pop(name).close()
+        if name not in self.indexes:
+            self.indexes[name] = shelve.open(
+                os.path.join(self.path, 'index_%s.db' % name), flag,
+                protocol=cPickle.HIGHEST_PROTOCOL)
+            if flag == 'n':
+                # dumbdbm, anydbm's fallback, ignores the 'n' flag.
+                self.indexes[name].clear()
+        return self.indexes[name]
+
+    def build_indexes(self):
+        """Build all of the indexes in ``index_names`` from scratch.
+
+        The indexes are accumulated in memory (one at a time) and then written
+        out, which is much faster than indexing the words one by one.
+
+        """
+
+        for name in self.index_names:
+            self.build_index(name)
+        self.meta['indexed'] = True
+        self.meta['clean_version'] = self.clean_version
+
+    def build_index(self, name):
+        index = {}
+        for word in self.meta['types']:
+            for key in self.get_index_keys(word).get(name, ()):
+                index.setdefault(key.encode('utf8'), []).append(word)
+        shelf = self.get_index(name, 'n')
+        for key, words in index.iteritems():
+            shelf[key] = sorted(words)
+
+    def index_word(self, word):
+        for name, keys in self.get_index_keys(word).iteritems():
+            shelf = self.get_index(name)
+            for key in keys:
+                key = key.encode('utf8')
+                words = shelf.get(key, [])
+                words.append(word)
+                shelf[key] = sorted(words)
+
+    def unindex_word(self, word):
+        for name, keys in self.get_index_keys(word).iteritems():
+            shelf = self.get_index(name)
+            for key in keys:
+                key = key.encode('utf8')
+                words = [w for w in shelf.get(key, []) if w != word]
+                if words:
+                    shelf[key] = words
+                else:
+                    shelf.pop(key, None)
+
+    def lookup(self, name, key):
+        """Return the sorted list of unique words that have ``key`` in the index
+        ``name``, e.g., ``store.lookup('morpheme', u'ihpiyi')``.
+
+        """
+
+        if not self.meta['indexed']:
+            raise ValueError('The indexes of the store at %s have not been built.' %
+                             self.path)
+        return self.get_index(name).get(key.encode('utf8'), [])
+
+    def analyses(self, transcription, cleaned=False):
+        """Return the sorted list of (mb, mg, cat) analyses of ``transcription``.
+
+        :param bool cleaned: if ``True``, ``transcription`` is looked up in the
+            ``cleaned_transcription`` index.
+
+        """
+
+        name = cleaned and 'cleaned_transcription' or 'transcription'
+        return [word[1:] for word in self.lookup(name, transcription)]
+
+    def gold_standard(self):
+        """Return the gold standard of the store: a sorted list of (tr, mb, mg, cat)
+        words, one per analyzed transcription, in a single pass over the types.
+
+        If a transcription has only one analysis, that is its gold analysis. If
+        it has several, the one with the most tokens is chosen; if there is no
+        unique most frequent analysis, the transcription is left out.
+
+        """
+
+        best = {} # transcriptions to [count, analysis, tied] triples
+        for word, (count, form_ids) in self.meta['types'].iteritems():
+            if word[3] is None:
+                continue
+            transcription, analysis = word[0], word[1:]
+            candidate = best.get(transcription)
+            if candidate is None or count > candidate[0]:
+                best[transcription] = [count, analysis, False]
+            elif count == candidate[0]:
+                candidate[2] = True
+        return sorted((transcription,) + analysis for transcription, (count, analysis, tied)
+                      in best.iteritems() if not tied)
+
+    def gold_folds(self, k=5, seed=0):
+        """Return the gold standard and ``k`` seeded training/test folds of it.
+
+        :returns: a 2-tuple: the gold standard list and the list of
+            ``(training, test)`` pairs returned by ``make_folds``.
+
+        The result is cached in the store directory and recomputed only when
+        the store's revision changes.
+
+        """
+
+        def build():
+            gold = self.gold_standard()
+            return gold, make_folds(gold, k, seed)
+        return self.cached('gold_folds_%d_%s' % (k, seed), build)
+
+    def sample(self, size=None, fraction=None, stratify=None, seed=0):
+        """Return a seeded random sample of the store's unique words.
+
+        :param int size: the number of words in the sample.
+        :param float fraction: the fraction of the words in the sample; used
+            if ``size`` is not given.
+        :param str stratify: ``'category'`` to stratify by category string,
+            ``'frequency'`` to stratify by frequency band (i.e., the binary
+            order of magnitude of the word's token count), or ``None``.
+        :param int seed: the seed of the random sample.
+        :returns: a sorted list of (tr, mb, mg, cat) words.
+
+        When stratified, each stratum contributes to the sample in proportion
+        to its size, the remainders going to the strata with the largest
+        fractional quotas. The sample is cached in the store directory and
+        recomputed only when the store's revision changes.
+
+        """
+
+        def build():
+            words = self.words()
+            target = size
+            if target is None:
+                target = int(round(fraction * len(words)))
+            target = min(target, len(words))
+            if stratify == 'category':
+                get_stratum = lambda word: word[3]
+            elif stratify == 'frequency':
+                types = self.meta['types']
+                get_stratum = lambda word: int(math.log(types[word][0], 2))
+            else:
+                get_stratum = lambda word: None
+            strata = {}
+            for word in words:
+                strata.setdefault(get_stratum(word), []).append(word)
+            quotas = {}
+            remainders = []
+            for stratum, members in sorted(strata.iteritems()):
+                quota = target * len(members) / float(len(words))
+                quotas[stratum] = int(quota)
+                remainders.append((int(quota) - quota, stratum))
+            for remainder, stratum in sorted(remainders)[:target - sum(quotas.values())]:
+                quotas[stratum] += 1
+            random_ = random.Random(seed)
+            sample = []
+            for stratum, members in sorted(strata.iteritems()):
+                sample.extend(random_.sample(members, quotas[stratum]))
+            return sorted(sample)
+
+        return self.cached('sample_%s' % hashlib.sha1(
+            repr((size, fraction, stratify, seed))).hexdigest(), build)
+
+    def cached(self, name, build):
+        """Return the value computed by ``build``, caching it in the store
+        directory under ``name`` until the store's revision changes.
+
+        """
+
+        revision = self.revision
+        cache_path = os.path.join(self.path, '%s.pickle' % name)
+        try:
+            cached = cPickle.load(open(cache_path, 'rb'))
+            if cached['revision'] == revision:
+                return cached['value']
+        except Exception:
+            pass
+        value = build()
+        with open(cache_path, 'wb') as f:
+            cPickle.dump({'revision': revision, 'value': value}, f,
+                         cPickle.HIGHEST_PROTOCOL)
+        return value
+
+    def get_bucket(self, word):
+        """Return the index of the Merkle bucket of ``word``.
+
+        """
+
+        return int(hashlib.sha1(repr(word)).hexdigest()[:8], 16) % self.bucket_count
+
+    def update_hashes(self):
+        """Rehash the words touched since the last call and their buckets and
+        return the resulting revision, i.e., the root hash of the store.
+
+        """
+
+        hashes = self.meta['hashes']
+        bucket_hashes = self.meta['bucket_hashes']
+        types = self.meta['types']
+        buckets = set()
+        for word in self.touched:
+            bucket = self.get_bucket(word)
+            buckets.add(bucket)
+            entry = types.get(word)
+            if entry:
+                hashes[bucket][word] = hashlib.sha1(repr((word, entry[0]))).hexdigest()
+            else:
+                hashes[bucket].pop(word, None)
+        self.touched = set()
+        for bucket in buckets:
+            bucket_hashes[bucket] = hashlib.sha1(
+                ''.join(sorted(hashes[bucket].itervalues()))).hexdigest()
+            self.save_snapshot('bucket_%s' % bucket_hashes[bucket], hashes[bucket])
+        if buckets or not self.meta['revision'] or \
+                not os.path.isfile(self.get_snapshot_path('root_%s' % self.meta['revision'])):
+            root = hashlib.sha1(''.join(map(str, bucket_hashes))).hexdigest()
+            self.save_snapshot('root_%s' % root, bucket_hashes)
+            if root != self.meta['revision']:
+                self.meta['previous_revision'] = self.meta['revision']
+                self.meta['revision'] = root
+        return self.meta['revision']
+
+    @property
+    def revision(self):
+        """The root hash of the store's words and token counts.
+
+        """
+
+        return self.update_hashes()
+
+    def get_snapshot_path(self, name):
+        return os.path.join(self.path, 'versions', '%s.pickle' % name)
+
+    def save_snapshot(self, name, value):
+        """Pickle ``value`` to the snapshot ``name`` unless it exists already;
+        snapshots are named by the hashes of their contents.
+
+        """
+
+        path = self.get_snapshot_path(name)
+        if not os.path.isfile(path):
+            if not os.path.isdir(os.path.dirname(path)):
+                os.mkdir(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                cPickle.dump(value, f, cPickle.HIGHEST_PROTOCOL)
+
+    def load_snapshot(self, name):
+        return cPickle.load(open(self.get_snapshot_path(name), 'rb'))
+
+    def prune_snapshots(self):
+        """Delete the snapshots that no revision in ``meta['revisions']`` (i.e.,
+        no recently saved revision) refers to.
+
+        """
+
+        versions_path = os.path.dirname(self.get_snapshot_path('root'))
+        if not os.path.isdir(versions_path):
+            return
+        keep = set()
+        for revision in self.meta.get('revisions', ()):
+            name = 'root_%s' % revision
+            if os.path.isfile(self.get_snapshot_path(name)):
+                keep.add(name)
+                keep.update('bucket_%s' % bucket_hash
+                            for bucket_hash in self.load_snapshot(name) if bucket_hash)
+        for file_name in os.listdir(versions_path):
+            if os.path.splitext(file_name)[0] not in keep:
+                os.remove(os.path.join(versions_path, file_name))
+
+    def diff(self, old_revision, new_revision=None):
+        """Return the changes to the words of the store between two revisions.
+
+        :param str old_revision: a revision of the store, e.g., one recorded by
+            a downstream cache.
+        :param str new_revision: defaults to the current revision.
+        :returns: a dict with ``added``, ``removed`` and ``changed`` (i.e., whose
+            token count changed) keys, each a sorted list of words; ``None`` if
+            ``old_revision`` has no snapshot in the store.
+
+        Only the buckets whose hashes differ between the revisions are loaded
+        and compared, so the cost is proportional to the size of the change.
+
+        """
+
+        new_revision = new_revision or self.revision
+        diff = {'added': [], 'removed': [], 'changed': []}
+        if old_revision == new_revision:
+            return diff
+        try:
+            old_buckets = self.load_snapshot('root_%s' % old_revision)
+            new_buckets = self.load_snapshot('root_%s' % new_revision)
+        except (IOError, EOFError, cPickle.UnpicklingError):
+            return None
+        for old_hash, new_hash in zip(old_buckets, new_buckets):
+            if old_hash == new_hash:
+                continue
+            old = old_hash and self.load_snapshot('bucket_%s' % old_hash) or {}
+            new = new_hash and self.load_snapshot('bucket_%s' % new_hash) or {}
+            for word, hash_ in new.iteritems():
+                if word not in old:
+                    diff['added'].append(word)
+                elif old[word] != hash_:
+                    diff['changed'].append(word)
+            diff['removed'].extend(word for word in old if word not in new)
+        for words in diff.values():
+            words.sort()
+        return diff
+
+    def changes(self):
+        """Return the ``diff`` between the previous and the current revision.
+
+        """
+
+        revision = self.revision
+        return self.diff(self.meta['previous_revision'] or revision, revision)
+
+    def save(self, word_list_path=None):
+        """Persist the store and, optionally, pickle its sorted list of unique
+        words to ``word_list_path``. The ``saved`` marker is written last.
+
+        :returns: the number of unique words in the store.
+
+        """
+
+        revision = self.update_hashes()
+        revisions = self.meta.setdefault('revisions', [])
+        if revision not in revisions:
+            revisions.append(revision)
+            del revisions[:-self.kept_revisions]
+            self.prune_snapshots()
+        self.forms.sync()
+        for index in self.indexes.values():
+            index.sync()
+        with open(self.meta_path, 'wb') as f:
+            cPickle.dump(self.meta, f, cPickle.HIGHEST_PROTOCOL)
+        words = self.words()
+        if word_list_path:
+            with open(word_list_path, 'wb') as f:
+                cPickle.dump(words, f, cPickle.HIGHEST_PROTOCOL)
+        open(os.path.join(self.path, 'saved'), 'wb').close()
+        self.saved = True
+        return len(words)
+
+    def close(self):
+        self.forms.close()
+        for index in self.indexes.values():
+            index.close()
+        self.indexes = {}
+
+
+class CorpusDict(object):
+    """A read-only, dict-like view of a store's ``cleaned_transcription`` index.
+
+    It maps cleaned transcriptions to [mb, mg, cat] lists and so can be used in
+    place of the ``corpus_dict`` built in
+    ``ParserResearcher.evaluate_parser_against_corpora``. As with that dict, the
+    last of several analyses of a transcription wins.
+
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, transcription, default=None):
+        words = self.store.lookup('cleaned_transcription', transcription)
+        if words:
+            return list(words[-1][1:])
+        return default
+
+    def __getitem__(self, transcription):
+        result = self.get(transcription)
+        if result is None:
+            raise KeyError(transcription)
+        return result
+
+    def __contains__(self, transcription):
+        return bool(self.store.lookup('cleaned_transcription', transcription))
+
+
+def make_folds(items, k=5, seed=0):
+    """Partition ``items`` into ``k`` folds and return a list of ``k``
+    ``(training, test)`` pairs, where each fold is the test set of one pair
+    and the other folds make up its training set.
+
+    The items are sorted before being shuffled by a ``random.Random(seed)``, so
+    the folds depend only on the set of items and on ``seed``.
+
+    """
+
+    items = sorted(items)
+    random.Random(seed).shuffle(items)
+    folds = [items[i::k] for i in range(k)]
+    return [(sorted(sum(folds[:i] + folds[i + 1:], [])), sorted(folds[i]))
+            for i in range(k)]
@@ -76,6 +76,22 @@ class OLDClient(object):
         self.session = requests.Session()
         self.session.headers.update({'Content-Type': 'application/json'})
 
+    def copy(self):
+        """Return a client of the same application with its own
+        requests.Session, authenticated with this client's cookies, e.g., for
+        use in another thread, since sessions should not be shared across
+        threads.
+
+        """
+
+        client = OLDClient(self.host, self.port)
+        client.session.headers.update(self.session.headers)
+        client.session.cookies.update(self.session.cookies)
+        return client
+
+    def close(self):
+        self.session.close()
+
     def login(self, username, password):
         payload = json.dumps({'username': username, 'password': password})
         response = self.session.post('%s/login/authenticate' % self.baseurl,
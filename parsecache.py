@@ -0,0 +1,342 @@
+#!/home/joel/env/bin/python
+# coding=utf8
+
+# Copyright 2013 Joel Dunham
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Parse Cache --- persistent caches of the outputs of locally saved parsers.
+
+The primary class defined here is ParseCache, an on-disk map from the
+transcriptions given to a parser to the ``(Parse, candidates)`` pairs it
+returned, so that unchanged parsers never parse the same word twice.
+ApplyCache similarly memoizes the outputs of a parser's transducers, e.g.,
+of its phonology applied down. ParseTable is a compiled, read-only lookup
+table of the parses of the words a parser is known to be given.
+
+"""
+
+import anydbm
+import cPickle
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from cStringIO import StringIO
+from sharedcorpus import StringTable
+
+
+class ParseCache(object):
+    """A database of the parses of one parser, keyed by transcription.
+
+    A cache belongs to a parser fingerprint, e.g., the parser's
+    ``compile_attempt`` value plus the candidate budget, and so needs no
+    invalidation: a recompiled parser gets a new fingerprint and a new cache.
+
+    Parses are pickled instances of the ``Parse`` class of a parse module. Since
+    the name of that module differs from one load to another (see
+    ``ParserResearcher.get_parse_module``), the classes of cached parses are
+    looked up in the parse module given to the cache, whatever module they were
+    pickled from.
+
+    :param str path: the path of the database.
+    :param module parse_module: the parse module of the parser, or a function
+        that returns it, which is only called if a cached parse needs it.
+
+    """
+
+    def __init__(self, path, parse_module=None):
+        self.path = path
+        self.parse_module = parse_module
+        self.db = anydbm.open(path, 'c')
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, transcription):
+        return transcription.encode('utf8')
+
+    def find_global(self, module_name, name):
+        if module_name.startswith('parse_module_') and self.parse_module:
+            if callable(self.parse_module):
+                self.parse_module = self.parse_module()
+            return getattr(self.parse_module, name)
+        module = __import__(module_name, fromlist=[name])
+        return getattr(module, name)
+
+    def loads(self, pickled):
+        unpickler = cPickle.Unpickler(StringIO(pickled))
+        unpickler.find_global = self.find_global
+        return unpickler.load()
+
+    def get(self, transcription, default=None):
+        """Return the cached ``(Parse, candidates)`` pair of ``transcription``.
+
+        """
+
+        key = self.get_key(transcription)
+        pickled = key in self.db and self.db[key] or None
+        if pickled is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self.loads(pickled)
+
+    def __contains__(self, transcription):
+        return self.get_key(transcription) in self.db
+
+    def __setitem__(self, transcription, value):
+        self.db[self.get_key(transcription)] = cPickle.dumps(
+            value, cPickle.HIGHEST_PROTOCOL)
+
+    def lookup(self, transcriptions):
+        """Split ``transcriptions`` into cached and uncached ones.
+
+        :returns: a 2-tuple: a dict from the cached transcriptions to their
+            ``(Parse, candidates)`` pairs and the list of uncached transcriptions.
+
+        """
+
+        cached = {}
+        uncached = []
+        for transcription in transcriptions:
+            value = self.get(transcription)
+            if value is None:
+                uncached.append(transcription)
+            else:
+                cached[transcription] = value
+        return cached, uncached
+
+    def update(self, parses):
+        for transcription, value in parses.iteritems():
+            self[transcription] = value
+
+    @property
+    def stats(self):
+        """A dict of the hits, misses and hit rate of the cache since it was opened.
+
+        """
+
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': lookups and self.hits / float(lookups) or 0.0}
+
+    def __len__(self):
+        return len(self.db)
+
+    def close(self):
+        self.db.close()
+
+
+class LRUCache(object):
+    """An in-memory map that holds at most ``maxsize`` items, forgetting the
+    least recently used ones first.
+
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.items.pop(key)
+            except KeyError:
+                return default
+            self.items[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+# The default of cache lookups, so that any cached value (even an empty or
+# ``None`` one) is a hit.
+not_cached = object()
+
+
+class ApplyCache(object):
+    """A memo of the outputs of a transducer, e.g., of a phonology applied
+    down to morpheme sequences, keyed by the transducer's fingerprint and the
+    input.
+
+    Lookups go to an in-memory ``LRUCache``, shared by all caches in the
+    process, and then, if a ``path`` is given, to a database on disk, so that
+    parsers with the same phonology share its outputs across evaluations and
+    runs. Inputs that have no outputs (i.e., that are missing from, or
+    ``None`` in, the transducer's results) are cached too, as ``[]``.
+
+    :param str fingerprint: identifies the compiled transducer.
+    :param str path: the path of the on-disk database; optional.
+
+    """
+
+    memory = LRUCache(200000)
+
+    def __init__(self, fingerprint, path=None):
+        self.fingerprint = fingerprint
+        self.db = path and anydbm.open(path, 'c')
+        self.hits = 0
+        self.misses = 0
+
+    def apply(self, inputs, function):
+        """Return a dict from each of ``inputs`` to its outputs, calling
+        ``function`` (which maps a list of inputs to such a dict) only on the
+        inputs that are not cached.
+
+        """
+
+        result = {}
+        missing = []
+        for input_ in inputs:
+            key = (self.fingerprint, input_)
+            outputs = self.memory.get(key, not_cached)
+            if outputs is not_cached and self.db is not None:
+                db_key = input_.encode('utf8')
+                if db_key in self.db:
+                    outputs = cPickle.loads(self.db[db_key])
+                    self.memory[key] = outputs
+            if outputs is not_cached:
+                missing.append(input_)
+            else:
+                result[input_] = outputs
+        self.hits += len(result)
+        self.misses += len(missing)
+        if missing:
+            computed = function(missing)
+            for input_ in missing:
+                outputs = computed.get(input_) or []
+                self.memory[(self.fingerprint, input_)] = outputs
+                if self.db is not None:
+                    self.db[input_.encode('utf8')] = cPickle.dumps(
+                        outputs, cPickle.HIGHEST_PROTOCOL)
+                result[input_] = outputs
+        return result
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': lookups and self.hits / float(lookups) or 0.0}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+
+
+class ParseTable(object):
+    """A read-only lookup table from the transcriptions known to a parser
+    (e.g., the words of its gold standard) to their parses, compiled into two
+    files that are memory-mapped when the table is opened.
+
+    The entries are stored in a ``StringTable``, three strings per word: the
+    transcription, the best parse (or ``None``) and the candidates. A parse is
+    its (mb, mg, cat) triplet joined by tabs; the candidates are joined by
+    newlines. The ``.index`` file is an open-addressing hash table
+    (with linear probing and at most half of its slots full) of the positions
+    of the entries, so each lookup reads a slot or two and one entry.
+
+    :param str path: the path of a table written by ``ParseTable.create``.
+
+    """
+
+    header = struct.Struct('<q')
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = StringTable(path)
+        with open(path + '.index', 'rb') as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.slot_count = self.header.unpack_from(self.index, 0)[0]
+
+    @staticmethod
+    def get_hash(key):
+        return zlib.crc32(key.encode('utf8')) & 0xffffffff
+
+    @classmethod
+    def create(cls, path, entries):
+        """Write a table of ``entries``, a dict from transcriptions to
+        ``(triplet, candidate_triplets)`` pairs (the triplet may be ``None``),
+        to ``path`` and return it.
+
+        """
+
+        slot_count = 2
+        while slot_count < 2 * len(entries):
+            slot_count *= 2
+        slots = [0] * slot_count
+        strings = []
+        join = lambda triplet: u'\t'.join(part or u'' for part in triplet)
+        for position, (key, (triplet, candidates)) in enumerate(sorted(entries.iteritems())):
+            strings.extend([key, triplet and join(triplet) or None,
+                            u'\n'.join(map(join, candidates))])
+            slot = cls.get_hash(key) & (slot_count - 1)
+            while slots[slot]:
+                slot = (slot + 1) & (slot_count - 1)
+            slots[slot] = position + 1
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path + '.index', 'wb') as f:
+            f.write(cls.header.pack(slot_count))
+            f.write(struct.pack('<%dq' % slot_count, *slots))
+        StringTable.create(tmp_path, strings).close()
+        os.rename(tmp_path + '.index', path + '.index')
+        os.rename(tmp_path, path)
+        return cls(path)
+
+    def get(self, key, default=None):
+        """Return the ``(triplet, candidate_triplets)`` pair of the transcription
+        ``key``.
+
+        """
+
+        slot = self.get_hash(key) & (self.slot_count - 1)
+        while True:
+            position = struct.unpack_from('<q', self.index,
+                                          self.header.size + 8 * slot)[0]
+            if not position:
+                return default
+            if self.entries[3 * (position - 1)] == key:
+                triplet, candidates = self.entries[3 * (position - 1) + 1:3 * position]
+                split = lambda parse: parse.split(u'\t')
+                return (triplet and split(triplet),
+                        candidates and map(split, candidates.split(u'\n')) or [])
+            slot = (slot + 1) & (self.slot_count - 1)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.entries) // 3
+
+    def iteritems(self):
+        for position in xrange(len(self)):
+            key = self.entries[3 * position]
+            yield key, self.get(key)
+
+    def close(self):
+        self.entries.close()
+        self.index.close()
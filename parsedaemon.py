@@ -0,0 +1,421 @@
+#!/home/joel/env/bin/python
+# coding=utf8
+
+# Copyright 2013 Joel Dunham
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Parse Daemon --- a long-running process that keeps locally saved parsers warm.
+
+The daemon loads the parse modules of locally saved parsers on demand, keeps
+the most recently used ones resident within a memory budget and serves batched
+parse, apply-up and apply-down requests over a Unix socket. Use
+ParseDaemonClient (e.g., via ``ParserResearcher.connect_parse_daemon``) to
+talk to it.
+
+Basic usage: ./parsedaemon.py -s localstore/parse_daemon.sock -m 2048
+
+ParseStringReader reads the parse strings of the OLD app's parsers into the
+same ``RemoteParse`` instances that the daemon returns.
+
+Requests and responses are length-prefixed pickles, so the socket must only
+be reachable by the researcher's own user.
+
+"""
+
+import cPickle
+import gc
+import optparse
+import os
+import re
+import resource
+import socket
+import struct
+import SocketServer
+import threading
+from collections import OrderedDict
+from oldclient import Log
+
+log = Log()
+
+
+class RemoteParse(object):
+    """The parts of a ``Parse`` instance that the researcher uses, i.e., its
+    ``parse`` string, its ``triplet`` and its ``morphemes``, in a form that can
+    be unpickled without the parse module that produced it.
+
+    """
+
+    __slots__ = ('parse', 'triplet', 'morphemes')
+
+    def __init__(self, parse, triplet=None, morphemes=None):
+        self.parse = parse
+        self.triplet = triplet
+        self.morphemes = morphemes
+
+    @classmethod
+    def from_parse(cls, parse):
+        """Return a ``RemoteParse`` copy of ``parse``; values that are not
+        ``Parse`` instances are returned as they are.
+
+        """
+
+        if not hasattr(parse, 'parse') or getattr(parse, 'timed_out', False):
+            return parse
+        return cls(parse.parse, getattr(parse, 'triplet', None),
+                   getattr(parse, 'morphemes', None))
+
+    def __getstate__(self):
+        return (self.parse, self.triplet, self.morphemes)
+
+    def __setstate__(self, state):
+        self.parse, self.triplet, self.morphemes = state
+
+
+class ParseStringReader(object):
+    """Read the parse strings returned by the OLD app's parsers, e.g.,
+    ``u'nit⦀1⦀agra-ihpiyi⦀dance⦀vai'``, as ``RemoteParse``
+    instances, so that remote parses can be evaluated without the parse
+    module; it also stands in for the ``parser`` object of a parse module in
+    ``ParserResearcher.evaluate_parse``.
+
+    :param unicode rare_delimiter: the delimiter of the shape, gloss and
+        category of each morpheme in a parse string.
+    :param unicode morpheme_delimiters: the characters that delimit morphemes.
+
+    """
+
+    def __init__(self, rare_delimiter, morpheme_delimiters=u'-='):
+        self.rare_delimiter = rare_delimiter
+        self.splitter = re.compile(u'([%s])' % re.escape(morpheme_delimiters))
+
+    def read(self, parse_string):
+        """Return the ``RemoteParse`` of ``parse_string`` (which may be ``None``).
+
+        """
+
+        if not parse_string:
+            return RemoteParse(None, None, [])
+        pieces = self.splitter.split(parse_string)
+        morphemes = [tuple((morpheme.split(self.rare_delimiter) + [u'', u''])[:3])
+                     for morpheme in pieces[::2]]
+        delimiters = pieces[1::2] + [u'']
+        triplet = [u''.join(u'%s%s' % (morpheme[index], delimiter)
+                            for morpheme, delimiter in zip(morphemes, delimiters))
+                   for index in range(3)]
+        return RemoteParse(parse_string, triplet, morphemes)
+
+    def get_parse_object(self, triplet):
+        """Return the ``RemoteParse`` of a (mb, mg, cat) ``triplet``.
+
+        """
+
+        triplet = (list(triplet) + [u'', u'', u''])[:3]
+        lines = [self.splitter.split(line)[::2] for line in triplet]
+        morphemes = [(shape, (lines[1][index:index + 1] or [u''])[0],
+                      (lines[2][index:index + 1] or [u''])[0])
+                     for index, shape in enumerate(lines[0])]
+        delimiters = self.splitter.split(triplet[0])[1::2] + [u'']
+        parse_string = u''.join(u'%s%s' % (self.rare_delimiter.join(morpheme), delimiter)
+                                for morpheme, delimiter in zip(morphemes, delimiters))
+        return RemoteParse(parse_string, list(triplet), morphemes)
+
+
+frame_header = struct.Struct('!Q')
+
+def send_message(sock, message):
+    pickled = cPickle.dumps(message, cPickle.HIGHEST_PROTOCOL)
+    sock.sendall(frame_header.pack(len(pickled)) + pickled)
+
+def receive_message(sock):
+    def receive(size):
+        chunks = []
+        while size:
+            chunk = sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise EOFError('The parse daemon connection was closed.')
+            chunks.append(chunk)
+            size -= len(chunk)
+        return ''.join(chunks)
+    size = frame_header.unpack(receive(frame_header.size))[0]
+    return cPickle.loads(receive(size))
+
+
+def get_resident_memory():
+    """Return the resident memory of this process in megabytes.
+
+    """
+
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / float(1 << 20)
+    except (IOError, IndexError, ValueError):
+        # ru_maxrss is the peak, in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class ParserPool(object):
+    """The parse modules resident in the daemon, in least recently used order.
+
+    The memory of a parser is estimated as the growth of the daemon's resident
+    memory while its module was loaded. When the estimated total exceeds
+    ``memory_budget`` megabytes (or there are more than ``max_parsers``
+    parsers), the least recently used parsers are evicted.
+
+    """
+
+    def __init__(self, memory_budget=2048, max_parsers=8):
+        self.memory_budget = memory_budget
+        self.max_parsers = max_parsers
+        self.parsers = OrderedDict() # parser directories to (parser, megabytes) pairs
+
+    def get_parse_module(self, parser):
+        from researcher import ParserResearcher
+        parser_dir = os.path.abspath(parser['local_copy_path'])
+        if parser_dir in self.parsers:
+            self.parsers[parser_dir] = self.parsers.pop(parser_dir)
+            return ParserResearcher.get_parse_module(parser)
+        memory = get_resident_memory()
+        parse_module = ParserResearcher.get_parse_module(parser)
+        megabytes = max(get_resident_memory() - memory, 0)
+        self.parsers[parser_dir] = (parser, megabytes)
+        log.info(u'Parser %s is resident (%0.1fMB).' % (parser.get('id'), megabytes))
+        self.evict(keep=parser_dir)
+        return parse_module
+
+    @property
+    def memory(self):
+        return sum(megabytes for parser, megabytes in self.parsers.itervalues())
+
+    def evict(self, keep=None):
+        from researcher import ParserResearcher
+        for parser_dir in self.parsers.keys():
+            if (self.memory <= self.memory_budget and
+                len(self.parsers) <= self.max_parsers):
+                break
+            if parser_dir == keep:
+                continue
+            parser, megabytes = self.parsers.pop(parser_dir)
+            ParserResearcher.evict_parse_module(parser)
+            log.info(u'Evicted parser %s (%0.1fMB).' % (parser.get('id'), megabytes))
+        gc.collect()
+
+    @property
+    def stats(self):
+        return {'parsers': [parser.get('id') for parser, megabytes in self.parsers.itervalues()],
+                'memory': self.memory, 'memory_budget': self.memory_budget}
+
+
+class ParseRequestHandler(SocketServer.BaseRequestHandler):
+    """Serve the requests of one connection, one message at a time.
+
+    Each request is a dict with a ``command`` (``'parse'``, ``'applyup'``,
+    ``'applydown'``, ``'get_parse_objects'``, ``'stats'`` or ``'shutdown'``),
+    the ``parser`` dict and the ``inputs`` list; ``parse`` also takes
+    ``max_candidates``, ``truncate``, ``time_budget`` and ``candidate_limit``.
+    Each response is a dict with a ``result`` or an ``error``.
+
+    """
+
+    def handle(self):
+        while True:
+            try:
+                request = receive_message(self.request)
+            except EOFError:
+                return
+            try:
+                response = {'result': self.server.dispatch(request)}
+            except Exception, e:
+                log.warn(u'Request failed: %s' % e)
+                response = {'error': u'%s: %s' % (e.__class__.__name__, e)}
+            send_message(self.request, response)
+
+
+class ParseDaemon(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    """A Unix socket server of parse, apply-up and apply-down requests.
+
+    Each connection is served by its own thread, but requests are dispatched
+    one at a time, since the transducers of a parse module are not safe to use
+    from several threads at once.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, memory_budget=2048, max_parsers=8):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        SocketServer.UnixStreamServer.__init__(self, socket_path, ParseRequestHandler)
+        os.chmod(socket_path, 0600)
+        self.socket_path = socket_path
+        self.pool = ParserPool(memory_budget, max_parsers)
+        self.lock = threading.Lock()
+
+    def dispatch(self, request):
+        with self.lock:
+            return self.dispatch_locked(request)
+
+    def dispatch_locked(self, request):
+        from researcher import parse_batch
+        command = request['command']
+        if command == 'stats':
+            return self.pool.stats
+        if command == 'shutdown':
+            # shutdown waits for serve_forever to return, so it cannot be
+            # called from the thread that is serving this request.
+            threading.Thread(target=self.shutdown).start()
+            return True
+        parse_module = self.pool.get_parse_module(request['parser'])
+        inputs = request['inputs']
+        if command == 'parse':
+            parses = parse_batch(parse_module, inputs, request.get('max_candidates', 10),
+                                 request.get('truncate', False), request.get('time_budget'),
+                                 request.get('candidate_limit'))
+            return dict((transcription, (RemoteParse.from_parse(parse),
+                                         map(RemoteParse.from_parse, candidates)))
+                        for transcription, (parse, candidates) in parses.iteritems())
+        if command == 'applyup':
+            return parse_module.parser.morphophonology.applyup(inputs)
+        if command == 'applydown':
+            return parse_module.phonology.applydown(inputs)
+        if command == 'get_parse_objects':
+            return [RemoteParse.from_parse(parse_module.parser.get_parse_object(triplet))
+                    for triplet in inputs]
+        raise ValueError('Unknown command %s' % command)
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class ParseDaemonClient(object):
+    """A connection to a ``ParseDaemon``.
+
+    :param str socket_path: the path of the daemon's Unix socket.
+
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.sock = None
+
+    def request(self, command, parser=None, inputs=(), **kwargs):
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.socket_path)
+        message = {'command': command, 'inputs': list(inputs), 'parser': parser and {
+            'id': parser.get('id'),
+            'local_copy_path': os.path.abspath(parser['local_copy_path']),
+            'compile_attempt': parser.get('compile_attempt')}}
+        message.update(kwargs)
+        try:
+            send_message(self.sock, message)
+            response = receive_message(self.sock)
+        except (socket.error, EOFError):
+            self.close()
+            raise
+        if 'error' in response:
+            raise Exception(u'Parse daemon error: %s' % response['error'])
+        return response['result']
+
+    def parse(self, parser, transcriptions, max_candidates=10, truncate=False, time_budget=None,
+              candidate_limit=None):
+        """Return the ``{transcription: (RemoteParse, candidates)}`` parses of
+        ``transcriptions`` by ``parser``, giving up on those that exceed the
+        ``time_budget`` or the ``candidate_limit``; see ``researcher.parse_batch``.
+
+        """
+
+        return self.request('parse', parser, transcriptions, max_candidates=max_candidates,
+                            truncate=truncate, time_budget=time_budget,
+                            candidate_limit=candidate_limit)
+
+    def applyup(self, parser, inputs):
+        return self.request('applyup', parser, inputs)
+
+    def applydown(self, parser, inputs):
+        return self.request('applydown', parser, inputs)
+
+    def get_parser_proxy(self, parser):
+        """Return a stand-in for the ``parser`` object of ``parser``'s parse module
+        that provides the ``get_parse_object`` method used by
+        ``ParserResearcher.evaluate_parse``, as well as a batch
+        ``get_parse_objects`` method that makes one request for many triplets.
+
+        """
+
+        return ParserProxy(self, parser)
+
+    def stats(self):
+        return self.request('stats')
+
+    def shutdown(self):
+        return self.request('shutdown')
+
+    def ping(self):
+        """Return ``True`` if the daemon answers.
+
+        """
+
+        try:
+            self.stats()
+            return True
+        except (socket.error, EOFError):
+            return False
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+
+class ParserProxy(object):
+    """See ``ParseDaemonClient.get_parser_proxy``.
+
+    """
+
+    def __init__(self, client, parser):
+        self.client = client
+        self.parser = parser
+
+    def get_parse_object(self, triplet):
+        return self.get_parse_objects([triplet])[0]
+
+    def get_parse_objects(self, triplets):
+        if not triplets:
+            return []
+        return self.client.request('get_parse_objects', self.parser, list(triplets))
+
+
+if __name__ == '__main__':
+
+    parser = optparse.OptionParser()
+    parser.add_option("-s", "--socket", default="localstore/parse_daemon.sock",
+        help="path of the Unix socket to listen on [default: %default]")
+    parser.add_option("-m", "--memory-budget", type="float", default=2048,
+        help="megabytes of memory that resident parsers may use [default: %default]")
+    parser.add_option("-n", "--max-parsers", type="int", default=8,
+        help="maximum number of resident parsers [default: %default]")
+    (options, args) = parser.parse_args()
+
+    # Import the daemon class from the module so that ``RemoteParse`` instances
+    # pickle as ``parsedaemon.RemoteParse``, not ``__main__.RemoteParse``.
+    from parsedaemon import ParseDaemon
+    daemon = ParseDaemon(options.socket, options.memory_budget, options.max_parsers)
+    log.info(u'Parse daemon listening on %s.' % options.socket)
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.server_close()
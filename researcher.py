@@ -24,15 +24,34 @@ and testing of morphological parsers and their attendant machinery.
 """
 
 import codecs
+import copy
 import cPickle
+import hashlib
 import os
 import pprint
+import Queue
 import zipfile
 import errno
 import imp
+import itertools
 import locale
+import resource
+import subprocess
 import sys
+import tempfile
+import threading
+import time
+import signal
+import unicodedata
+from contextlib import contextmanager
+from multiprocessing import Pool, Pipe
+from multiprocessing.pool import ThreadPool
 from oldclient import OLDClient, Log
+from corpusstore import CorpusStore, CorpusDict
+from sharedcorpus import StringTable, SharedCorpus
+from parsecache import ParseCache, ApplyCache, ParseTable
+from compactparses import CompactParses
+from parsedaemon import ParseDaemonClient, ParseStringReader, RemoteParse
 
 # Wrap sys.stdout into a StreamWriter to allow writing unicode.
 # This allows piping of unicode output.
@@ -44,23 +63,202 @@ from oldclient import OLDClient, Log
 log = Log()
 
 
-class Keeper(object):
+class Keeper(dict):
     """Filters everything from a unicode string except the characters in ``keep``.
 
+    A Keeper is its own translate table: the first time a code point is looked
+    up, ``__missing__`` decides whether it is kept and caches the decision, so
+    every later lookup of that code point is a plain dict hit.
+
     """
 
     def __init__(self, keep):
+        dict.__init__(self)
         self.keep = set(map(ord, keep))
 
-    def __getitem__(self, n):
-        if n not in self.keep:
-            return None
-        return unichr(n)
+    def __missing__(self, n):
+        value = n if n in self.keep else None
+        self[n] = value
+        return value
 
     def __call__(self, s):
         return unicode(s).translate(self)
 
 
+class Normalizer(object):
+    """A compiled, memoizing transcription normalization pipeline.
+
+    :param bool lower: if ``True``, transcriptions are lowercased first.
+    :param unicode delete: characters to delete.
+    :param dict translate: single characters to their replacement strings.
+    :param list substitutions: ``(old, new)`` pairs of (multi-character)
+        strings, replaced in order after the translation.
+    :param int memo_size: the maximum number of normalizations memoized; a
+        full memo is emptied before the next one is added.
+
+    Deletion and single-character replacement are fused into one translate
+    table that is built once, so each transcription is lowercased, translated
+    and substituted in a single pass. Results are memoized; use
+    ``normalize_all`` to normalize whole corpora. ``version`` is a hash of the
+    pipeline, so that data keyed on its output (e.g., a ``CorpusStore``'s
+    ``cleaned_transcription`` index) can tell when the pipeline has changed.
+
+    """
+
+    def __init__(self, lower=False, delete=u'', translate=None, substitutions=(),
+                 memo_size=200000):
+        self.lower = lower
+        self.table = dict((ord(c), None) for c in delete)
+        self.table.update((ord(c), r) for c, r in (translate or {}).iteritems())
+        self.substitutions = tuple(substitutions)
+        self.version = hashlib.sha1(repr((lower, sorted(self.table.items()),
+                                          self.substitutions))).hexdigest()
+        self.memo_size = memo_size
+        self.memo = {}
+
+    def __call__(self, transcription):
+        try:
+            return self.memo[transcription]
+        except KeyError:
+            result = self.normalize(transcription)
+            if len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[transcription] = result
+            return result
+
+    def normalize(self, transcription):
+        """Return the normalization of ``transcription``, without memoizing it.
+
+        """
+
+        result = transcription
+        if self.lower:
+            result = result.lower()
+        result = result.translate(self.table)
+        for old, new in self.substitutions:
+            result = result.replace(old, new)
+        return result
+
+    def normalize_all(self, transcriptions):
+        """Return the list of the normalizations of ``transcriptions``.
+
+        """
+
+        return map(self, transcriptions)
+
+
+class Progress(object):
+    """Log the throughput of a long task and the estimated time to its end.
+
+    :param int total: the number of items the task will process.
+    :param unicode task_descr: what is being done to the items, e.g., ``u'parsed'``.
+    :param float report_every: the minimum number of seconds between reports.
+
+    """
+
+    def __init__(self, total, task_descr=u'processed', report_every=5.0):
+        self.total = total
+        self.task_descr = task_descr
+        self.report_every = report_every
+        self.done = 0
+        self.start_time = self.last_report = time.time()
+
+    def format_seconds(self, seconds):
+        return u'%02dm%02ds' % (seconds / 60, seconds % 60)
+
+    def update(self, count=1):
+        self.done += count
+        now = time.time()
+        if now - self.last_report >= self.report_every or self.done >= self.total:
+            self.last_report = now
+            self.report()
+
+    @property
+    def rate(self):
+        """The number of items processed per second so far.
+
+        """
+
+        return self.done / max(time.time() - self.start_time, 1e-6)
+
+    def report(self):
+        rate = self.rate
+        eta = rate and (self.total - self.done) / rate or 0
+        log.info(u'%d of %d %s (%0.1f/s, ETA %s).' % (self.done, self.total,
+            self.task_descr, rate, self.format_seconds(eta)))
+
+
+class AdaptiveBatcher(object):
+    """Choose batch sizes that bring the latency of each batch toward a target
+    and keep memory growth under a bound.
+
+    Use ``iter_batches`` to split a list into batches; after each batch is
+    processed, the next size is the one that would have taken
+    ``target_seconds`` at the measured rate, at most doubling or halving the
+    current size at a time. If the peak memory of the process has grown by
+    more than ``max_memory_growth`` kilobytes during a batch, the size is
+    halved instead. Changes of less than 10% are ignored; the others are logged.
+
+    :param unicode task_descr: names the task in the log, e.g., ``u'local parsing'``.
+
+    """
+
+    def __init__(self, task_descr, initial=20, minimum=1, maximum=2000,
+                 target_seconds=2.0, max_memory_growth=256 * 1024):
+        self.task_descr = task_descr
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_memory_growth = max_memory_growth
+
+    def get_peak_memory(self):
+        # ru_maxrss is in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def record(self, size, seconds, memory_growth=0):
+        """Adjust the batch size given that a batch of ``size`` items took
+        ``seconds`` and grew peak memory by ``memory_growth`` kilobytes.
+
+        """
+
+        if memory_growth > self.max_memory_growth:
+            new_size = self.size // 2
+            reason = u'memory grew %dKB' % memory_growth
+        else:
+            ideal = size * self.target_seconds / max(seconds, 1e-3)
+            new_size = int(min(max(ideal, self.size / 2.0), self.size * 2))
+            reason = u'%0.2fs for %d' % (seconds, size)
+        new_size = min(max(new_size, self.minimum), self.maximum)
+        if abs(new_size - self.size) <= self.size // 10:
+            # Ignore jitter.
+            return
+        if size < self.size and new_size > self.size:
+            # A short (i.e., last) batch says little about larger ones.
+            return
+        if new_size != self.size:
+            log.info(u'Batch size for %s: %d -> %d (%s).' % (
+                self.task_descr, self.size, new_size, reason))
+        self.size = new_size
+
+    def iter_batches(self, items, process):
+        """Yield ``process(batch)`` for consecutive batches of ``items``, adapting
+        the size of each batch to the measurements of the previous ones.
+
+        """
+
+        position = 0
+        while position < len(items):
+            batch = items[position:position + self.size]
+            position += len(batch)
+            memory = self.get_peak_memory()
+            start_time = time.time()
+            result = process(batch)
+            self.record(len(batch), time.time() - start_time,
+                        self.get_peak_memory() - memory)
+            yield result
+
+
 class ParserResearcher(object):
     """Functionality for performing parser-related research on a live OLD web service.
 
@@ -85,6 +283,8 @@ class ParserResearcher(object):
         """
 
         port = kwargs.get('port', '80')
+        self.record_lock = threading.RLock()
+        self.thread_state = threading.local()
         self.my_dir = os.path.abspath(os.path.dirname(__file__))
         self.set_record_path(**kwargs)
         self.setup_localstore(**kwargs)
@@ -97,6 +297,37 @@ class ParserResearcher(object):
                 password)
             sys.exit()
 
+    @property
+    def old(self):
+        """The ``OLDClient`` of the current thread: the researcher's own client,
+        unless the thread is running inside ``own_old_client``.
+
+        """
+
+        thread_state = getattr(self, 'thread_state', None)
+        return getattr(thread_state, 'old', None) or self._old
+
+    @old.setter
+    def old(self, value):
+        self._old = value
+
+    @contextmanager
+    def own_old_client(self):
+        """Within this context, requests made by the current thread through
+        ``self.old`` go through a copy of the researcher's client, i.e., a
+        session of its own; see ``OLDClient.copy``.
+
+        """
+
+        if getattr(self, 'thread_state', None) is None:
+            self.thread_state = threading.local()
+        client = self.thread_state.old = self._old.copy()
+        try:
+            yield client
+        finally:
+            del self.thread_state.old
+            client.close()
+
     # This is what is stored in record.pickle
     default_record = {
         'searches': {},
@@ -121,6 +352,7 @@ class ParserResearcher(object):
         for object_type in self.default_record.keys():
             subdir = os.path.join(self.localstore, object_type)
             self.make_directory_safely(subdir)
+        self.make_directory_safely(os.path.join(self.localstore, 'shared'))
 
     @property
     def record(self):
@@ -146,12 +378,19 @@ class ParserResearcher(object):
     def dump_record(self):
         """Try to pickle the researcher's record.
 
+        The record is serialized to a string first (which does not release the
+        GIL) so that threads updating it concurrently, e.g., those of
+        ``materialize_corpora``, cannot change it mid-dump.
+
         """
 
-        try:
-            cPickle.dump(self.record, open(self.record_path, 'wb'))
-        except Exception:
-            log.warn(u'Attempt to to pickle-dump to %s failed.' % self.record_path)
+        with self.record_lock:
+            try:
+                pickled_record = cPickle.dumps(self.record)
+                with open(self.record_path, 'wb') as f:
+                    f.write(pickled_record)
+            except Exception:
+                log.warn(u'Attempt to to pickle-dump to %s failed.' % self.record_path)
 
     def clear_record(self, clear_corpora=False):
         """Set record to {} and persist.
@@ -243,9 +482,11 @@ class ParserResearcher(object):
         if create_response.get('errors') and 'name' in create_response['errors']:
             # A corpus with this name exists already.
             corpus = [c for c in self.old.get('corpora') if c['name'] == name][0]
-            corpus_form_search = corpus.get('form_search', {})
-            if not corpus_form_search or corpus_form_search.get('id') != search_id:
-                # The existing corpus has the wrong form_search value -- update it.
+            # A corpus defined only by its content has no form_search.
+            corpus_search_id = (corpus.get('form_search') or {}).get('id')
+            if (corpus_search_id != search_id or
+                (content is not None and corpus.get('content') != content)):
+                # The existing corpus has the wrong form_search or content value -- update it.
                 result = self.old.put('corpora/%s' % corpus['id'], params)
             else:
                 result = corpus
@@ -255,12 +496,134 @@ class ParserResearcher(object):
             raise Exception('Unable to create corpus named "%s".' % name)
         return result
 
+    def push_folds(self, name, folds, form_ids):
+        """Create (or update) a training and a test corpus on the OLD for each fold.
+
+        :param unicode name: the prefix of the corpus names; fold ``i`` yields
+            the corpora "<name> <i> training" and "<name> <i> test".
+        :param list folds: ``(training, test)`` pairs of words, as returned by
+            ``CorpusStore.gold_folds``.
+        :param dict form_ids: maps each word to the id of the form representing it.
+        :returns: a list of ``(training_corpus, test_corpus)`` pairs.
+
+        Each corpus is defined by its content, i.e., a compact comma-delimited
+        list of form ids; corpora whose recorded content is unchanged are not
+        requested again.
+
+        """
+
+        key = 'corpora'
+        pushed = []
+        for index, fold in enumerate(folds, 1):
+            pair = []
+            for label, words in zip((u'training', u'test'), fold):
+                corpus_name = u'%s %d %s' % (name, index, label)
+                content = u','.join(map(unicode,
+                    sorted(set(form_ids[word] for word in words if word in form_ids))))
+                record = self.record.get(key, {}).get(corpus_name, {})
+                if record.get('content') != content:
+                    log.info(u'Pushing corpus "%s".' % corpus_name)
+                    record.update(self.create_corpus(corpus_name, content=content))
+                    self.record.setdefault(key, {})[corpus_name] = record
+                    self.dump_record()
+                pair.append(record)
+            pushed.append(tuple(pair))
+        return pushed
+
     def get_corpus_forms(self, corpus):
         query = {
             'query': {
                 'filter': ['Form', 'corpora', 'id', '=', corpus['id']]}}
         return self.old.search('forms', query)
 
+    def iter_search(self, path, model, filter_, items_per_page=500):
+        """Yield the results of a search, requesting them one page at a time.
+
+        :param str path: the resource path to search, e.g., ``'forms'``.
+        :param str model: the model name used for ordering, e.g., ``'Form'``.
+        :param list filter_: the filter expression of the search.
+        :param int items_per_page: the number of results requested per page.
+
+        At most one page of results is held in memory at any time.
+
+        """
+
+        page = 1
+        while True:
+            query = {
+                'query': {
+                    'filter': filter_,
+                    'order_by': [model, 'id', 'asc']},
+                'paginator': {
+                    'page': page, 'items_per_page': items_per_page}}
+            response = self.old.search(path, query)
+            items = response['items']
+            for item in items:
+                yield item
+            if not items or page * items_per_page >= response['paginator']['count']:
+                break
+            page += 1
+
+    def iter_corpus_forms(self, corpus, items_per_page=500):
+        """Yield the form dicts of ``corpus``, requesting them one page at a time.
+
+        Unlike ``get_corpus_forms``, at most one page of forms is held in
+        memory at any time.
+
+        """
+
+        return self.iter_search('forms', 'Form',
+            ['Form', 'corpora', 'id', '=', corpus['id']], items_per_page)
+
+    def get_corpus_form_count(self, corpus):
+        """Return the number of forms in ``corpus`` using a single one-item page.
+
+        """
+
+        query = {
+            'query': {
+                'filter': ['Form', 'corpora', 'id', '=', corpus['id']]},
+            'paginator': {
+                'page': 1, 'items_per_page': 1}}
+        return self.old.search('forms', query)['paginator']['count']
+
+    def materialize_corpora(self, save_func, specs, max_workers=4, **kwargs):
+        """Create and locally save several corpora concurrently.
+
+        :param function save_func: the method that creates and saves one
+            corpus, e.g., ``save_well_analyzed_words_corpus``. It is called as
+            ``save_func(**spec)`` (plus ``kwargs``) and must return the
+            corpus' record.
+        :param list specs: dicts of keyword arguments for ``save_func``, e.g.,
+            ``{'relation': 'enterer', 'attribute': 'last_name', 'value': 'Dunham'}``.
+        :param int max_workers: the maximum number of corpora being created,
+            and therefore of requests in flight to the OLD, at any one time.
+        :returns: a dict from corpus names to corpus records.
+
+        The search creation, corpus creation, form fetching and local saving of
+        the corpora are I/O bound, so they are run in a pool of threads. Each
+        corpus is requested through a client (i.e., a ``requests.Session``) of
+        its own, and ``save_func`` must hold ``self.record_lock`` while it
+        updates the record.
+
+        """
+
+        self.record # Load the record before the threads start using it.
+        def materialize(spec):
+            spec = dict(spec)
+            spec.update(kwargs)
+            with self.own_old_client():
+                return save_func(**spec)
+        log.info(u'Creating %d corpora with at most %d at a time.' % (
+            len(specs), max_workers))
+        pool = ThreadPool(max_workers)
+        try:
+            corpora = pool.map(materialize, specs)
+        finally:
+            pool.close()
+            pool.join()
+        return dict((corpus['name'], corpus) for corpus in corpora)
+
     def well_analyzed(self, word):
         """Return ``True`` if the word is well analyzed, i.e., contains no unknown
         categories in its syntactic category string; else ``False``.
@@ -275,6 +638,39 @@ class ParserResearcher(object):
         splitter = lambda w: w.split('-')
         return unknown_category not in splitter(word[3])
 
+    def iter_form_words(self, form_list, filter_=False):
+        """Yield every word token in the form dicts of ``form_list``.
+
+        :param iterable form_list: form dicts; may be a generator, e.g., the
+            one returned by ``iter_corpus_forms``.
+        :param bool filter_: if set to ``True``, a word will not be yielded if
+            it is not well analyzed according to ``self.well_analyzed``.
+
+        The representation of each word is a quadruple of the form (tr, mb, mg, cat).
+
+        """
+
+        for form in form_list:
+            for word in self.form_words(form, filter_):
+                yield word
+
+    def form_words(self, form, filter_=False):
+        """Return the list of word tokens in the form dict ``form``.
+
+        :param bool filter_: see ``iter_form_words``.
+
+        """
+
+        if form['syntactic_category_string']:
+            return [word for word in zip(
+                        form['transcription'].split(),
+                        form['morpheme_break'].split(),
+                        form['morpheme_gloss'].split(),
+                        form['syntactic_category_string'].split())
+                    if not filter_ or self.well_analyzed(word)]
+        else:
+            return [(word, None, None, None) for word in form['transcription'].split()]
+
     def get_form_words(self, form_list, filter_=False):
         """Return a sorted list of all unique words in the form dicts of ``form_list``.
 
@@ -285,50 +681,243 @@ class ParserResearcher(object):
 
         """
 
-        words = set()
-        for form in form_list:
-            if form['syntactic_category_string']:
-                for word in zip(
-                    form['transcription'].split(),
-                    form['morpheme_break'].split(),
-                    form['morpheme_gloss'].split(),
-                    form['syntactic_category_string'].split()):
-                    if not filter_ or self.well_analyzed(word):
-                        words.add(word)
-            else:
-                for word in form['transcription'].split():
-                    words.add((word, None, None, None))
-        words = sorted(words)
-        return words
+        return sorted(set(self.iter_form_words(form_list, filter_)))
+
+    def get_corpus_store_path(self, file_path):
+        """Return the path to the ``CorpusStore`` directory of the corpus whose
+        word list is pickled at ``file_path``.
+
+        """
+
+        return u'%s.store' % os.path.splitext(file_path)[0]
+
+    def open_corpus_store(self, file_path):
+        """Return the ``CorpusStore`` of the corpus whose word list is pickled at
+        ``file_path``. The caller is responsible for closing it.
+
+        The store's indexes can be queried directly, e.g.,
+        ``store.lookup('morpheme', u'ihpiyi')`` or ``store.analyses(u'nitsspiyi')``.
+
+        """
+
+        store_path = self.get_corpus_store_path(file_path)
+        self.make_directory_safely(store_path)
+        return CorpusStore(store_path, clean=self.clean_transcription,
+                           clean_version=self.clean_version)
+
+    def open_saved_corpus_store(self, file_path):
+        """Like ``open_corpus_store`` but for reading: return ``None`` instead of
+        creating a store if the corpus pickled at ``file_path`` has no store,
+        if its last save or sync did not complete, or if it holds no forms.
+
+        """
+
+        store_path = self.get_corpus_store_path(file_path)
+        if not CorpusStore.is_saved(store_path):
+            return None
+        store = CorpusStore(store_path, clean=self.clean_transcription,
+                            clean_version=self.clean_version)
+        if not len(store):
+            store.close()
+            return None
+        return store
+
+    def require_saved_corpus_store(self, corpus):
+        """Return the store of the locally saved ``corpus``, as opened by
+        ``open_saved_corpus_store``, or raise if there is none.
+
+        """
+
+        store = self.open_saved_corpus_store(corpus['local_copy_path'])
+        if store is None:
+            raise Exception(u'Corpus "%s" has no complete local store; save it again'
+                            u' with save_corpus_words.' % corpus.get('name', corpus.get('id')))
+        return store
+
+    def save_corpus_words(self, corpus, file_path, filter_=False, items_per_page=500):
+        """Stream the forms of ``corpus`` from the OLD into a local corpus store and
+        pickle the corpus' unique words to ``file_path``.
+
+        :param dict corpus: a corpus with an ``id`` value.
+        :param str file_path: where to pickle the sorted list of unique words.
+        :param bool filter_: passed to ``form_words``.
+        :param int items_per_page: passed to ``iter_corpus_forms``.
+        :returns: the number of unique words saved.
+
+        If the corpus was saved before, the store's ``changes`` are the words
+        that differ from the previous copy; an unchanged corpus keeps its
+        ``revision``, so work cached against it stays valid.
+
+        The word list is the same as ``get_form_words(get_corpus_forms(corpus))``
+        but the full list of forms is never materialized: forms are requested a
+        page at a time and their words are written to the store as they arrive,
+        so memory use is bounded by the number of unique words. The store's
+        indexes are built once all forms have been added.
+
+        """
+
+        store = self.open_corpus_store(file_path)
+        try:
+            store.clear(filter_)
+            for form in self.iter_corpus_forms(corpus, items_per_page):
+                store.add_form(form['id'], form['datetime_modified'],
+                               self.form_words(form, filter_))
+            store.build_indexes()
+            count = store.save(file_path)
+            self.log_corpus_changes(corpus, store)
+            return count
+        finally:
+            store.close()
+
+    def log_corpus_changes(self, corpus, store):
+        """Log how the words of ``corpus`` changed in its last save or sync.
+
+        """
+
+        changes = store.changes()
+        if changes is None:
+            log.info(u'Corpus %s is at revision %s.' % (corpus['id'], store.revision[:10]))
+        else:
+            log.info(u'Corpus %s is at revision %s: %d words added, %d removed, %d recounted.' % (
+                corpus['id'], store.revision[:10], len(changes['added']),
+                len(changes['removed']), len(changes['changed'])))
+
+    def sync_corpus_words(self, corpus, filter_=None, items_per_page=500):
+        """Patch the local copy of ``corpus`` with the forms changed on the OLD
+        since it was last saved or synced.
+
+        :param dict corpus: a corpus that has been saved locally, i.e., one with
+            a ``local_copy_path`` value.
+        :param bool filter_: passed to ``form_words``; defaults to the value
+            used when the corpus was saved.
+        :returns: a 2-tuple: the number of forms updated and the number removed.
+
+        Only the forms of the corpus whose ``datetime_modified`` is not older
+        than the newest one in the store are requested, and only those that
+        are new to the store or whose ``datetime_modified`` differs from the
+        stored one are re-tokenized. Deletions (and forms that have joined or
+        left the corpus without being modified) are detected by comparing the
+        form count of the store with that of the corpus on the server; only
+        if they differ is the whole corpus paged through, to remove the forms
+        of the store that are no longer in it and add those that are missing.
+        If the counts still differ, or if the store's last save or sync did
+        not complete, the corpus is saved again from scratch.
+        The store's indexes are patched along with its words.
+
+        """
+
+        file_path = corpus['local_copy_path']
+        store = self.open_corpus_store(file_path)
+        updated = set()
+        removed = 0
+        def update(form):
+            if store.get_modified(form['id']) != form['datetime_modified']:
+                store.add_form(form['id'], form['datetime_modified'],
+                               self.form_words(form, filter_))
+                updated.add(form['id'])
+        try:
+            if filter_ is None:
+                filter_ = store.meta['filter_']
+            since = store.newest_modified
+            # A store whose last save or sync was interrupted cannot be patched.
+            consistent = since is not None and store.saved
+            if consistent:
+                # ``>=`` rather than ``>``, so that forms modified in the same
+                # second as the newest stored one are not missed; those that
+                # have not changed since are skipped by ``update``.
+                for form in self.iter_search('forms', 'Form',
+                        ['and', [['Form', 'corpora', 'id', '=', corpus['id']],
+                                 ['Form', 'datetime_modified', '>=', since]]],
+                        items_per_page):
+                    update(form)
+                form_count = self.get_corpus_form_count(corpus)
+                if len(store) != form_count:
+                    log.info(u'Corpus %s has %d forms on the OLD and %d locally; comparing'
+                             u' their ids.' % (corpus['id'], form_count, len(store)))
+                    # The OLD's search has no field selection, so the id set
+                    # is collected from whole pages of forms.
+                    current = set()
+                    for form in self.iter_corpus_forms(corpus, items_per_page):
+                        current.add(form['id'])
+                        update(form)
+                    for form_id in store.form_id_set() - current:
+                        store.remove_form(form_id)
+                        removed += 1
+                    consistent = len(store) == self.get_corpus_form_count(corpus)
+            if consistent:
+                store.save(file_path)
+                self.log_corpus_changes(corpus, store)
+        finally:
+            store.close()
+        if not consistent:
+            log.warn(u'Local copy of corpus %s cannot be synced; saving it again.' %
+                     corpus['id'])
+            self.save_corpus_words(corpus, file_path, filter_, items_per_page)
+        log.info(u'Synced corpus %s: %d forms updated, %d removed.' % (
+            corpus['id'], len(updated), removed))
+        return len(updated), removed
+
+    def get_corpus_word_tokens(self, corpus, filter_=False):
+        """Return a sorted list of all word tokens of the locally saved ``corpus``,
+        as ``get_form_word_tokens`` would return them for its forms, i.e., screened
+        by ``screen_word_tokens``.
+
+        :param bool filter_: passed to ``screen_word_tokens``.
+
+        The tokens are expanded from the type counts of the corpus' store, so
+        the forms are not rescanned; use ``store.word_counts()`` directly
+        where unscreened counts will do.
+
+        """
+
+        store = self.require_saved_corpus_store(corpus)
+        try:
+            return sorted(self.screen_word_tokens(store.tokens(), filter_))
+        finally:
+            store.close()
 
     def get_form_word_tokens(self, form_list, filter_=False):
-        """Return a sorted list of all words in the form dicts of ``form_list``.
+        """Return a list of all words in the form dicts of ``form_list``, screened
+        by ``screen_word_tokens``.
 
-        :param bool filter_: if set to ``True``, a word will not be added if it
-            is not well analyzed according to ``self.well_analyzed``.
+        :param bool filter_: passed to ``screen_word_tokens``.
 
         The representation of each word is a quadruple of the form (tr, mb, mg, cat).
+        This rescans the forms; for a locally saved corpus, use
+        ``get_corpus_word_tokens``, which reads the counts of the corpus' store.
 
         """
-        screen = Keeper([u'p', u't', u'k', u'm', u'n', u's', u'w', u'y', u'h', u"'", u'a', u'i', u'o', u'\u0301'])
 
-        words = []
-        for form in form_list:
-            if form['syntactic_category_string']:
-                for tr, mb, mg, sc in zip(
-                    form['transcription'].split(),
-                    form['morpheme_break'].split(),
-                    form['morpheme_gloss'].split(),
-                    form['syntactic_category_string'].split()):
-                    tr = tr.lower()
-                    if screen(tr) == tr:
-                        word = (tr, mb, mg, sc)
-                        if not filter_ or self.well_analyzed(word):
-                            words.append(word)
-            else:
-                for word in form['transcription'].split():
-                    words.append((word, None, None, None))
-        return words
+        return list(self.screen_word_tokens(self.iter_form_words(form_list), filter_))
+
+    # The characters that the transcriptions of analyzed word tokens may
+    # contain; see ``screen_word_tokens``.
+    word_token_screen = Keeper([u'p', u't', u'k', u'm', u'n', u's', u'w', u'y', u'h', u"'",
+                                u'a', u'i', u'o', u'\u0301'])
+
+    def screen_word_tokens(self, words, filter_=False):
+        """Yield the (tr, mb, mg, cat) word tokens of ``words`` that are fit to be
+        counted. The transcriptions of analyzed words (those with a category)
+        are lowercased, and those that then contain characters other than
+        those kept by ``word_token_screen`` are dropped. Unanalyzed words
+        are yielded as they are.
+
+        :param bool filter_: if set to ``True``, analyzed words that are not
+            well analyzed according to ``self.well_analyzed`` are dropped, too.
+
+        """
+
+        screen = self.word_token_screen
+        for word in words:
+            tr, mb, mg, sc = word
+            if sc is None:
+                yield word
+                continue
+            tr = tr.lower()
+            if screen(tr) == tr:
+                word = (tr, mb, mg, sc)
+                if not filter_ or self.well_analyzed(word):
+                    yield word
 
     def create_phonology(self, name, script, **kwargs):
         """Create a foma phonology.
@@ -577,10 +1166,16 @@ class ParserResearcher(object):
         the absolute path to the directory containing the locally saved parser.
 
         """
+        # The compile attempt is recorded next to the export, so that a stale
+        # export can be detected; see ``get_local_export_status``.
+        compile_attempt = self.old.get('morphologicalparsers/%s' % id_).get('compile_attempt')
         export_response = self.old.get('morphologicalparsers/%s/export' % id_,
             params=None, verbose=False)
         archive_path = os.path.join(dirpath, 'archive.zip')
         self.make_directory_safely(dirpath)
+        if compile_attempt:
+            with open(os.path.join(dirpath, 'compile_attempt'), 'w') as f:
+                f.write(compile_attempt)
         try:
             with open(archive_path, 'wb') as f:
                 f.write(export_response.content)
@@ -592,52 +1187,973 @@ class ParserResearcher(object):
         zip_archive.close()
         return os.path.join(dirpath, 'archive')
 
-    def parse(self, parser, transcriptions):
+    def parse(self, parser, transcriptions, batch_size=0, concurrency=1, retries=3):
         """Parse the ``transcriptions`` list using the OLD app's parser with ``id==parser['id']``.
 
-        """
-        return self.old.put('morphologicalparsers/%s/parse' % parser['id'],
-                                      {'transcriptions': transcriptions})
+        :param int batch_size: the number of transcriptions per request. If
+            ``0``, the size of each request is adapted to the latency of the
+            previous ones (see ``AdaptiveBatcher``); if ``None``, all
+            transcriptions are sent in one request.
+        :param int concurrency: the maximum number of requests in flight; see
+            ``iter_parse_requests``.
+        :param int retries: the number of times a failed request is retried.
+        :returns: a dict from transcriptions to parses.
 
+        """
 
-    def parse_locally(self, parser, transcriptions, batch_size=0):
-        """Return the locally stored parser's parses of ``transcriptions``.
+        parses = {}
+        for batch_parsed in self.iter_parse_requests(parser, transcriptions, batch_size,
+                                                     concurrency, retries):
+            parses.update(batch_parsed)
+        return parses
+
+    def iter_parse_requests(self, parser, transcriptions, batch_size=0, concurrency=1,
+                            retries=3):
+        """Parse ``transcriptions`` with the OLD app's parser and yield the
+        ``{transcription: parse}`` dict of each request, as it returns. See
+        ``parse`` for the parameters.
+
+        If ``concurrency`` is greater than 1, the transcriptions are split into
+        chunks of ``batch_size`` (by default, enough for each concurrent
+        request to get four) and sent by a pool of ``concurrency`` threads, so
+        that at most that many requests are in flight at any one time and the
+        server's workers are kept busy; chunks are yielded in the order in
+        which they return. Each thread's requests go through a client of its
+        own (see ``own_old_client``).
 
         """
-        print '\n\nIN PARSE LOCALLY IN RESEARCHER\n\n'
-
-        # WARNING: setting max_candidates to None will cause the system to cache and return
-        # all candidates proposed by the morphophonology; this will probably slow things down...
-        max_candidates = 10 # 10 is a good number to use...
 
-        parse_module = self.get_parse_module(parser)
+        request = lambda batch: self.request_parses(parser, batch, retries)
+        if batch_size is None:
+            yield request(transcriptions)
+            return
+        if concurrency > 1:
+            chunk_size = batch_size or max(1, min(500, -(-len(transcriptions) // (concurrency * 4))))
+            chunks = [transcriptions[pos:pos + chunk_size]
+                      for pos in xrange(0, len(transcriptions), chunk_size)]
+            log.info(u'Parsing %d transcriptions with parser %s in %d requests, %d at a time.' % (
+                len(transcriptions), parser['id'], len(chunks), concurrency))
+            def request_in_thread(batch):
+                with self.own_old_client():
+                    return request(batch)
+            pool = ThreadPool(concurrency)
+            try:
+                for batch_parsed in pool.imap_unordered(request_in_thread, chunks):
+                    yield batch_parsed
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+            return
         if batch_size:
-            parses = {}
-            n = len(transcriptions)
-            for chunk in (transcriptions[pos: pos + batch_size] for pos in
-                          xrange(0, len(transcriptions), batch_size)):
-                chunk_parsed = parse_module.parser.parse(chunk, parse_objects=True, max_candidates=max_candidates)
-                parses.update(chunk_parsed)
-                print '%d of %d parsed' % (len(parses), n)
-            return parses
+            batches = (request(transcriptions[pos:pos + batch_size])
+                       for pos in xrange(0, len(transcriptions), batch_size))
         else:
-            return parse_module.parser.parse(transcriptions, parse_objects=True, max_candidates=max_candidates)
+            batcher = AdaptiveBatcher(u'remote parsing with parser %s' % parser['id'],
+                                      target_seconds=5.0)
+            batches = batcher.iter_batches(transcriptions, request)
+        for batch_parsed in batches:
+            yield batch_parsed
+
+    def request_parses(self, parser, transcriptions, retries=3, backoff=1.0):
+        """Return the ``{transcription: parse}`` dict of one parse request.
+
+        A request that fails (i.e., raises or returns something other than a
+        dict of parses) is retried up to ``retries`` times, waiting ``backoff``
+        seconds, then twice as long, and so on. If it still fails, e.g.,
+        because the server times out on it, its transcriptions are split in
+        two and each half is requested on its own.
+
+        """
+
+        path = 'morphologicalparsers/%s/parse' % parser['id']
+        for attempt in xrange(retries + 1):
+            try:
+                response = self.old.put(path, {'transcriptions': transcriptions})
+            except Exception, e:
+                error = u'%s: %s' % (e.__class__.__name__, e)
+            else:
+                if isinstance(response, dict) and not (
+                    'error' in response or 'errors' in response):
+                    return response
+                error = isinstance(response, dict) and (
+                    response.get('error') or response.get('errors')) or response
+            if attempt < retries:
+                log.warn(u'Parse request of %d transcriptions failed (%s); retrying.' % (
+                    len(transcriptions), error))
+                time.sleep(backoff * 2 ** attempt)
+        if len(transcriptions) > 1:
+            middle = len(transcriptions) // 2
+            log.warn(u'Parse request of %d transcriptions failed (%s); splitting it.' % (
+                len(transcriptions), error))
+            parses = self.request_parses(parser, transcriptions[:middle], retries, backoff)
+            parses.update(self.request_parses(parser, transcriptions[middle:], retries, backoff))
+            return parses
+        raise Exception(u'Parser %s failed to parse %s: %s' % (
+            parser['id'], transcriptions and transcriptions[0], error))
+
+    def get_parse_string_reader(self, parser):
+        """Return a ``ParseStringReader`` for the parse strings returned by the
+        OLD app's ``parser``, using the parser's rare delimiter and the
+        application's morpheme delimiters.
+
+        """
+
+        morpheme_delimiters = self.morpheme_delimiters
+        if morpheme_delimiters is None:
+            try:
+                settings = self.old.get('applicationsettings')
+                delimiters = settings[-1]['morpheme_delimiters']
+            except (IndexError, KeyError, TypeError, IOError):
+                delimiters = None
+            if delimiters:
+                morpheme_delimiters = self.morpheme_delimiters = u''.join(delimiters.split(u','))
+            else:
+                # The OLD's default delimiters, used (but not remembered) when
+                # the app's settings cannot be read.
+                log.warn(u'Could not get the morpheme delimiters of the OLD app; using -=.')
+                morpheme_delimiters = u'-='
+        return ParseStringReader(parser['morphology_rare_delimiter'], morpheme_delimiters)
+
+    # The morpheme delimiters of the OLD app, e.g., ``u'-='``, once read by
+    # ``get_parse_string_reader``.
+    morpheme_delimiters = None
+
+
+    # The client of the parse daemon that local parsing goes through, if any;
+    # see ``connect_parse_daemon``.
+    parse_daemon = None
+
+    def connect_parse_daemon(self, socket_path=None, start=True, memory_budget=2048,
+                             timeout=30):
+        """Make local parsing, apply-up and apply-down go through a parse daemon,
+        i.e., a long-running process that keeps parsers loaded between runs
+        (see ``parsedaemon.py``).
+
+        :param str socket_path: the daemon's Unix socket; defaults to
+            ``parse_daemon.sock`` in the localstore.
+        :param bool start: if ``True`` and no daemon answers on the socket, one
+            is started in the background.
+        :param float memory_budget: megabytes of memory that the parsers
+            resident in a newly started daemon may use.
+        :returns: the ``ParseDaemonClient``.
+
+        """
+
+        socket_path = socket_path or os.path.join(self.localstore, 'parse_daemon.sock')
+        client = ParseDaemonClient(socket_path)
+        if not client.ping():
+            if not start:
+                raise Exception(u'No parse daemon is listening on %s.' % socket_path)
+            log_path = u'%s.log' % os.path.splitext(socket_path)[0]
+            log.info(u'Starting a parse daemon on %s; see %s.' % (socket_path, log_path))
+            with open(log_path, 'a') as log_file:
+                subprocess.Popen([sys.executable, os.path.join(self.my_dir, 'parsedaemon.py'),
+                                  '-s', socket_path, '-m', str(memory_budget)],
+                                 cwd=self.my_dir, stdout=log_file, stderr=subprocess.STDOUT)
+            start_time = time.time()
+            while not client.ping():
+                if time.time() - start_time > timeout:
+                    raise Exception(u'The parse daemon on %s did not start.' % socket_path)
+                time.sleep(0.1)
+        self.parse_daemon = client
+        return client
+
+    def disconnect_parse_daemon(self, shutdown=False):
+        """Stop using the parse daemon and, if ``shutdown`` is ``True``, stop it.
+
+        """
+
+        if self.parse_daemon:
+            if shutdown:
+                self.parse_daemon.shutdown()
+            self.parse_daemon.close()
+            self.parse_daemon = None
+
+    def parse_locally(self, parser, transcriptions, batch_size=0, workers=1, use_cache=True,
+                      max_candidates=10, truncate=False, time_budget=None, candidate_limit=None,
+                      remote=False, concurrency=4, compact=False):
+        """Return the locally stored parser's parses of ``transcriptions`` as a
+        ``{transcription: (Parse, candidates)}`` dict; see ``iter_parse``.
+
+        :param bool compact: if ``True``, a ``CompactParses`` container is
+            returned instead of a dict; it takes a fraction of the memory and
+            rebuilds the parses (as ``RemoteParse`` instances) when they are read.
+
+        """
 
-    def get_parse_module(self, parser):
+        parses = self.iter_parse(parser, transcriptions, batch_size, workers, use_cache,
+                                 max_candidates, truncate, time_budget, candidate_limit,
+                                 remote, concurrency)
+        if compact:
+            return CompactParses.from_parses(parses, self.get_parse_string_reader(parser))
+        return dict((transcription, (parse, candidates))
+                    for transcription, parse, candidates in parses)
+
+    def iter_parse(self, parser, transcriptions, batch_size=0, workers=1, use_cache=True,
+                   max_candidates=10, truncate=False, time_budget=None, candidate_limit=None,
+                   remote=False, concurrency=4, server_compile_attempt=None):
+        """Yield a ``(transcription, parse, candidates)`` triple for each of
+        ``transcriptions``, as the locally stored parser produces them.
+
+        :param int batch_size: the number of transcriptions given to the parser
+            at once; if ``0``, it is adapted to the latency and memory use of
+            each batch (see ``AdaptiveBatcher``).
+        :param int workers: if greater than 1, the transcriptions are parsed in
+            shards by a pool of ``workers`` processes; see ``iter_parse_in_parallel``.
+        :param bool use_cache: if ``True``, transcriptions in the parser's
+            parse table (see ``build_parse_table``) are looked up there, those
+            already parsed by the same compiled parser are read from its parse
+            cache (see ``get_parse_cache``) and the rest are added to it.
+        :param int max_candidates: the candidate budget, i.e., the maximum
+            number of morphophonological candidates returned (and cached) per
+            transcription. WARNING: ``None`` will cause the system to cache and
+            return all candidates proposed by the morphophonology; this will
+            probably slow things down...
+        :param bool truncate: if ``True``, the candidates of each transcription
+            are truncated to the first ``max_candidates`` before the language
+            model ranks them. This is not a time bound, since the apply-up is
+            still complete; see ``parse_batch``.
+        :param float time_budget: if supplied, the seconds a transcription
+            may take before it is given up on; the transcriptions are then
+            parsed one at a time, in a child process that is killed when one
+            overruns the budget; see ``parse_within_budget``.
+        :param int candidate_limit: if supplied, transcriptions for which the
+            morphophonology proposes more candidates are given up on, too
+            (once the apply-up of their batch is complete).
+        :param remote: if ``True``, the transcriptions are parsed by the
+            OLD app's parser, in up to ``concurrency`` concurrent requests (see
+            ``iter_parse_requests``), so that parsers that are not saved
+            locally can be evaluated; the parses are then ``RemoteParse``
+            instances read from the parse strings (see
+            ``get_parse_string_reader``) and there are no candidates. The
+            candidate budget, ``workers`` and the time budget do not apply.
+        :param server_compile_attempt: the parser's ``compile_attempt`` on the
+            OLD app, which keys the cache of remote parses; if not supplied, it
+            is requested from the app.
+
+        If ``remote`` is ``'auto'``, the work is split between the local and
+        the remote parser by their measured throughput; see ``iter_parse_hybrid``.
+
+        Transcriptions that are given up on are yielded with a ``ParseTimeout``
+        (whose ``parse`` is ``None``) and are not cached. Cached parses are
+        yielded first. Throughput (words per second) and the estimated time
+        remaining are logged as parsing proceeds.
+
+        If the researcher is connected to a parse daemon, each batch is parsed
+        by the daemon (and ``workers`` is ignored); the parses and candidates
+        are then ``RemoteParse`` instances.
+
+        """
+
+        if remote == 'auto':
+            for triple in self.iter_parse_hybrid(
+                    parser, transcriptions, concurrency=concurrency,
+                    server_compile_attempt=server_compile_attempt, batch_size=batch_size,
+                    workers=workers, use_cache=use_cache, max_candidates=max_candidates,
+                    truncate=truncate, time_budget=time_budget, candidate_limit=candidate_limit):
+                yield triple
+            return
+        progress = Progress(len(transcriptions), u'parsed')
+        if use_cache and not remote:
+            known, transcriptions = self.lookup_parse_table(parser, transcriptions,
+                                                            max_candidates, truncate)
+            for transcription, (parse, candidates) in known.iteritems():
+                progress.update()
+                yield transcription, parse, candidates
+        cache = None
+        if use_cache:
+            cache = self.get_parse_cache(parser, max_candidates, truncate, remote,
+                                         server_compile_attempt)
+        try:
+            uncached = []
+            for transcription in transcriptions:
+                cached = cache is not None and cache.get(transcription)
+                if cached:
+                    progress.update()
+                    yield transcription, cached[0], cached[1]
+                else:
+                    uncached.append(transcription)
+            if cache is not None:
+                stats = cache.stats
+                log.info(u'Parse cache of parser %s: %d hits, %d misses (%0.2f%% hit rate).' % (
+                    parser.get('id'), stats['hits'], stats['misses'], 100 * stats['hit_rate']))
+            if remote:
+                reader = self.get_parse_string_reader(parser)
+                batches = (dict((transcription, (reader.read(parse), []))
+                                for transcription, parse in batch_parsed.iteritems())
+                           for batch_parsed in self.iter_parse_requests(
+                               parser, uncached, batch_size, concurrency))
+            elif workers > 1 and len(uncached) > 1 and not self.parse_daemon:
+                # Loaded before the pool is forked; see ``iter_parse_in_parallel``.
+                self.get_parse_module(parser)
+                batches = self.iter_parse_in_parallel(parser, uncached, max_candidates,
+                                                      batch_size, workers, truncate, time_budget,
+                                                      candidate_limit)
+            else:
+                if self.parse_daemon:
+                    parse_one_batch = lambda batch: self.parse_daemon.parse(
+                        parser, batch, max_candidates, truncate, time_budget, candidate_limit)
+                else:
+                    parse_module = self.get_parse_module(parser)
+                    parse_one_batch = lambda batch: parse_batch(
+                        parse_module, batch, max_candidates, truncate, time_budget, candidate_limit)
+                if batch_size:
+                    batches = (parse_one_batch(uncached[pos:pos + batch_size])
+                               for pos in xrange(0, len(uncached), batch_size))
+                else:
+                    batcher = AdaptiveBatcher(u'local parsing with parser %s' % parser.get('id'))
+                    batches = batcher.iter_batches(uncached, parse_one_batch)
+            timeouts = 0
+            for batch_parsed in batches:
+                if cache is not None:
+                    cache.update(dict((transcription, value) for transcription, value
+                                      in batch_parsed.iteritems()
+                                      if not getattr(value[0], 'timed_out', False)))
+                for transcription, (parse, candidates) in batch_parsed.iteritems():
+                    timeouts += getattr(parse, 'timed_out', False)
+                    yield transcription, parse, candidates
+                progress.update(len(batch_parsed))
+            if timeouts:
+                log.warn(u'Parser %s gave up on %d transcriptions that exceeded the budget.' % (
+                    parser.get('id'), timeouts))
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def iter_parse_hybrid(self, parser, transcriptions, warmup=50, concurrency=4,
+                          server_compile_attempt=None, **kwargs):
+        """Parse ``transcriptions`` with both the locally saved parser and the OLD
+        app's parser at once, and yield a ``(transcription, parse, candidates)``
+        triple for each, as ``iter_parse`` does.
+
+        The throughput of each path is measured on a warm-up sample of
+        ``warmup`` transcriptions and the rest are split between them in
+        proportion to it. The remote share is parsed in a thread (with up to
+        ``concurrency`` requests in flight) while the local share is parsed in
+        this one; if the remote parser fails, what is left of its share is
+        parsed locally. If the local export is missing or stale (see
+        ``get_local_export_status``), everything is parsed remotely; if the
+        server cannot be reached, everything is parsed locally.
+
+        So that the parses of both paths can be evaluated together, they are
+        all yielded as ``RemoteParse`` instances (see ``get_parse_string_reader``).
+        Remotely parsed transcriptions have no candidates.
+
+        :param server_compile_attempt: the parser's ``compile_attempt`` on the
+            OLD app, if the caller has it; otherwise it is requested.
+        :param kwargs: passed to ``iter_parse`` for local parsing.
+
+        """
+
+        if server_compile_attempt is None:
+            server_compile_attempt = self.get_server_compile_attempt(parser)
+        status = self.get_local_export_status(parser, server_compile_attempt)
+        remote_kwargs = {'batch_size': kwargs.get('batch_size', 0), 'remote': True,
+                         'use_cache': kwargs.get('use_cache', True), 'concurrency': concurrency,
+                         'server_compile_attempt': server_compile_attempt}
+        if status != 'current':
+            if server_compile_attempt is None:
+                raise Exception(u'Parser %s cannot be parsed with: its local export is %s and'
+                                u' the server cannot be reached.' % (parser['id'], status))
+            log.warn(u'The local export of parser %s is %s; parsing remotely.' % (
+                parser['id'], status))
+            for triple in self.iter_parse(parser, transcriptions, **remote_kwargs):
+                yield triple
+            return
+        reader = self.get_parse_string_reader(parser)
+        def read(triples):
+            for transcription, parse, candidates in triples:
+                if not (isinstance(parse, RemoteParse) or getattr(parse, 'timed_out', False)):
+                    parse = reader.read(parse.parse)
+                    candidates = [reader.read(candidate.parse) for candidate in candidates]
+                yield transcription, parse, candidates
+        parse_locally = lambda batch: read(self.iter_parse(parser, batch, **kwargs))
+        if server_compile_attempt is None:
+            log.warn(u'The OLD app cannot be reached; parsing locally with parser %s.' % (
+                parser['id'],))
+            for triple in parse_locally(transcriptions):
+                yield triple
+            return
+        parse_remotely = lambda batch: self.iter_parse(parser, batch, **remote_kwargs)
+        if not self.parse_daemon:
+            # Loaded here, so that the local warm-up does not time the loading.
+            self.get_parse_module(parser)
+
+        # Warm up both paths and measure their throughput.
+        pending = list(transcriptions)
+        rates = {}
+        for name, parse in (('local', parse_locally), ('remote', parse_remotely)):
+            sample, pending = pending[:warmup], pending[warmup:]
+            start_time = time.time()
+            parsed = set()
+            try:
+                for triple in parse(sample):
+                    parsed.add(triple[0])
+                    yield triple
+            except Exception, e:
+                if name == 'local':
+                    raise
+                leftover = [t for t in sample if t not in parsed] + pending
+                log.warn(u'Remote parsing with parser %s failed (%s); parsing the remaining %d'
+                         u' words locally.' % (parser['id'], e, len(leftover)))
+                for triple in parse_locally(leftover):
+                    yield triple
+                return
+            rates[name] = len(sample) / max(time.time() - start_time, 1e-3)
+        if not pending:
+            return
+        local_count = int(round(len(pending) * rates['local'] /
+                                (rates['local'] + rates['remote'])))
+        local_share, remote_share = pending[:local_count], pending[local_count:]
+        log.info(u'Parser %s: %0.1f words/s locally, %0.1f words/s remotely; parsing %d words'
+                 u' locally and %d remotely.' % (parser['id'], rates['local'], rates['remote'],
+                                                  len(local_share), len(remote_share)))
+
+        # Parse both shares at once, passing on remote parses as they arrive.
+        # ``stop`` tells the remote thread to give up, e.g., if the consumer
+        # stops iterating.
+        received = Queue.Queue()
+        stop = threading.Event()
+        def run_remote():
+            try:
+                with self.own_old_client():
+                    for triple in parse_remotely(remote_share):
+                        if stop.is_set():
+                            break
+                        received.put(triple)
+            except Exception, e:
+                received.put(e)
+            received.put(None)
+        thread = threading.Thread(target=run_remote)
+        thread.daemon = True
+        thread.start()
+        remote_parsed = set()
+        remote_error = []
+        def drain(block):
+            while True:
+                try:
+                    item = received.get(block)
+                except Queue.Empty:
+                    return
+                if item is None:
+                    received.put(None) # so that later drains return too
+                    return
+                if isinstance(item, Exception):
+                    remote_error.append(item)
+                    continue
+                remote_parsed.add(item[0])
+                yield item
+        try:
+            for triple in parse_locally(local_share):
+                yield triple
+                for triple in drain(False):
+                    yield triple
+            for triple in drain(True):
+                yield triple
+            thread.join()
+        finally:
+            stop.set()
+        if remote_error:
+            leftover = [t for t in remote_share if t not in remote_parsed]
+            log.warn(u'Remote parsing with parser %s failed (%s); parsing the remaining %d'
+                     u' words locally.' % (parser['id'], remote_error[0], len(leftover)))
+            for triple in parse_locally(leftover):
+                yield triple
+
+    def get_server_compile_attempt(self, parser):
+        """Return the current ``compile_attempt`` value of ``parser`` on the OLD
+        app, or ``None`` if the app cannot be reached.
+
+        """
+
+        try:
+            return self.old.get('morphologicalparsers/%s' % parser['id'])['compile_attempt']
+        except Exception, e:
+            log.warn(u'Could not get parser %s from the OLD app: %s' % (parser['id'], e))
+            return None
+
+    def get_local_export_status(self, parser, server_compile_attempt=None):
+        """Return ``'missing'`` if ``parser`` has not been saved locally, ``'stale'``
+        if it was exported from an earlier compile attempt than
+        ``server_compile_attempt`` (see ``save_parser_locally``) and
+        ``'current'`` otherwise.
+
+        """
+
+        parser_dir = parser.get('local_copy_path')
+        if not parser_dir or not os.path.isfile(os.path.join(parser_dir, 'parse.py')):
+            return 'missing'
+        marker_path = os.path.join(os.path.dirname(os.path.abspath(parser_dir)),
+                                   'compile_attempt')
+        exported = parser.get('compile_attempt')
+        if os.path.isfile(marker_path):
+            with open(marker_path) as f:
+                exported = f.read().strip()
+        if server_compile_attempt and exported and exported != server_compile_attempt:
+            return 'stale'
+        return 'current'
+
+    # The normalizations that can be named in the ``fallbacks`` of
+    # ``iter_parse_with_fallbacks``. They are applied to the transcriptions
+    # that are parsed, i.e., after ``clean_transcription``, so subclasses
+    # whose cleaning already lowercases or strips punctuation should drop
+    # them.
+    fallback_normalizations = {
+        'lowercase': lambda transcription: transcription.lower(),
+        'punctuation': lambda transcription: u''.join(
+            c for c in transcription if not unicodedata.category(c).startswith('P'))
+    }
+
+    def iter_parse_with_fallbacks(self, parser, transcriptions, fallbacks=(), report=None,
+                                  **kwargs):
+        """Parse ``transcriptions`` in several passes and yield a
+        ``(transcription, parse, candidates)`` triple for each, as ``iter_parse``
+        does.
+
+        :param list fallbacks: the normalizations of the fallback passes, in
+            order; each is a name in ``fallback_normalizations`` (e.g.,
+            ``'lowercase'``) or a ``(name, function)`` pair, e.g.,
+            ``('flattened', flattener)``.
+        :param list report: if supplied, it receives a dict per pass with its
+            ``name``, the number of words ``attempted``, the number of
+            ``unique`` normalized forms parsed, the number of words it
+            ``parsed`` and the ``seconds`` it took.
+        :param kwargs: passed to ``iter_parse``.
+
+        The first pass parses the raw transcriptions and its successes are
+        yielded right away. Each fallback pass normalizes only the words that
+        have failed so far, parses each distinct normalized form once (forms
+        already parsed in an earlier pass are not parsed again) and, for each
+        word whose normalized form parses, yields that parse under the
+        original transcription. Words that fail every pass are yielded with
+        their first-pass parse.
+
+        """
+
+        report = report if report is not None else []
+        start_time = time.time()
+        parsed = {}  # successfully parsed forms, of any pass, to (parse, candidates)
+        failed = {}  # transcriptions that have failed so far, to their first-pass results
+        for transcription, parse, candidates in self.iter_parse(parser, transcriptions, **kwargs):
+            if parse.parse:
+                parsed[transcription] = parse, candidates
+                yield transcription, parse, candidates
+            else:
+                failed[transcription] = parse, candidates
+        report.append({'name': u'raw', 'attempted': len(transcriptions),
+                       'unique': len(transcriptions),
+                       'parsed': len(transcriptions) - len(failed),
+                       'seconds': time.time() - start_time})
+        for fallback in fallbacks:
+            if not failed:
+                break
+            if isinstance(fallback, basestring):
+                if fallback not in self.fallback_normalizations:
+                    raise ValueError(u'Unknown fallback %s; the cleaned transcriptions'
+                                     u' may already be normalized this way.' % fallback)
+                name, normalize = fallback, self.fallback_normalizations[fallback]
+            else:
+                name, normalize = fallback
+            start_time = time.time()
+            normalized = {}
+            for transcription in failed:
+                normal_form = normalize(transcription)
+                if normal_form and normal_form != transcription:
+                    normalized.setdefault(normal_form, []).append(transcription)
+            to_parse = [normal_form for normal_form in normalized if normal_form not in parsed]
+            for normal_form, parse, candidates in self.iter_parse(parser, to_parse, **kwargs):
+                if parse.parse:
+                    parsed[normal_form] = parse, candidates
+            pass_parsed = 0
+            for normal_form, originals in normalized.iteritems():
+                if normal_form in parsed:
+                    parse, candidates = parsed[normal_form]
+                    for transcription in originals:
+                        del failed[transcription]
+                        pass_parsed += 1
+                        yield transcription, parse, candidates
+            report.append({'name': name, 'attempted': sum(map(len, normalized.values())),
+                           'unique': len(to_parse), 'parsed': pass_parsed,
+                           'seconds': time.time() - start_time})
+        for transcription, (parse, candidates) in failed.iteritems():
+            yield transcription, parse, candidates
+        for pass_ in report:
+            log.info(u'Parse pass %s: %d of %d words parsed, %d forms sent to the parser, %0.2fs.' % (
+                pass_['name'], pass_['parsed'], pass_['attempted'], pass_['unique'],
+                pass_['seconds']))
+
+    def get_parse_cache(self, parser, max_candidates=None, truncate=False, remote=False,
+                        server_compile_attempt=None):
+        """Return the ``ParseCache`` of ``parser``. The caller is responsible for
+        closing it.
+
+        The cache is keyed by the fingerprint of the parser's local export
+        (see ``get_parser_fingerprint``), i.e., of the files that actually do
+        the parsing, and by the candidate budget, so a new export starts a new
+        cache and re-evaluating an unchanged one parses nothing. The record's
+        ``compile_attempt`` is not used, since the local export may predate
+        it.
+
+        Parses requested from the OLD app (which have no candidates) are cached
+        separately, keyed by the parser's id and its ``compile_attempt`` on the
+        app (``server_compile_attempt``, which is requested if not supplied),
+        so the local export is not needed. If the app cannot be reached,
+        ``None`` is returned and remote parses are not cached.
+
+        Each parser export has its own cache: the apply-up results of parsers
+        that share a morphology and phonology are not shared between them.
+        Only the phonology's apply-down is (see ``phonologize_locally``).
+
+        """
+
+        cache_dir = os.path.join(self.localstore, 'parsers', 'parse_cache')
+        if remote:
+            compile_attempt = server_compile_attempt or self.get_server_compile_attempt(parser)
+            if compile_attempt is None:
+                log.warn(u'Remote parses of parser %s are not cached.' % parser['id'])
+                return None
+            self.make_directory_safely(cache_dir)
+            key = (parser['id'], compile_attempt, 'remote')
+            return ParseCache(os.path.join(cache_dir, hashlib.sha1(repr(key)).hexdigest()))
+        fingerprint = self.get_parser_fingerprint(parser)
+        self.make_directory_safely(cache_dir)
+        key = (fingerprint, max_candidates)
+        if truncate:
+            key += ('truncate',)
+        path = os.path.join(cache_dir, hashlib.sha1(repr(key)).hexdigest())
+        return ParseCache(path, lambda: self.get_parse_module(parser))
+
+    def get_parse_table_path(self, parser, max_candidates=10, truncate=False):
+        """Return the path of the parse table of ``parser``, i.e., a file next
+        to its local export whose name depends on the export's fingerprint
+        and on the candidate budget, so that a new export gets a new table.
+
+        """
+
+        # ``'exact'``: tables are keyed by the exact transcriptions parsed;
+        # earlier ones, keyed by their NFD forms, are not used.
+        key = (self.get_parser_fingerprint(parser), max_candidates, truncate, 'exact')
+        return os.path.join(os.path.dirname(os.path.abspath(parser['local_copy_path'])),
+                            'parse_table_%s' % hashlib.sha1(repr(key)).hexdigest()[:16])
+
+    def build_parse_table(self, parser, corpus, max_candidates=10, truncate=False, **kwargs):
+        """Parse the words of the locally saved ``corpus`` (e.g., a gold
+        standard or training corpus) and add their parses to the parse table
+        of ``parser``, a compiled lookup table (see ``parsecache.ParseTable``)
+        from transcriptions to best parses and candidates that ``iter_parse``
+        consults before the parser itself.
+
+        The table is keyed by the exact transcriptions that were parsed, not
+        by a normalization of them, since the parser may well parse two forms
+        of a word (e.g., its NFC and NFD forms) differently.
+
+        :param kwargs: passed to ``iter_parse``, e.g., ``workers``.
+        :returns: the number of words in the table.
+
+        """
+
+        path = self.get_parse_table_path(parser, max_candidates, truncate)
+        entries = {}
+        if os.path.isfile(path):
+            table = ParseTable(path)
+            entries.update(table.iteritems())
+            table.close()
+        transcriptions = sorted(set(t for t, m, g, c in self.load_corpus_list(corpus)))
+        log.info(u'Adding %d words of corpus "%s" to the parse table of parser %s.' % (
+            len(transcriptions), corpus['name'], parser['id']))
+        triplet = lambda parse: list(parse.triplet)
+        for transcription, parse, candidates in self.iter_parse(
+                parser, transcriptions, max_candidates=max_candidates, truncate=truncate, **kwargs):
+            if not getattr(parse, 'timed_out', False):
+                entries[transcription] = (
+                    parse.parse and triplet(parse) or None, map(triplet, candidates))
+        ParseTable.create(path, entries).close()
+        log.info(u'Saved the parse table of parser %s (%d words) to %s.' % (
+            parser['id'], len(entries), path))
+        return len(entries)
+
+    def lookup_parse_table(self, parser, transcriptions, max_candidates=10, truncate=False):
+        """Split ``transcriptions`` into those in the parse table of ``parser``
+        and the rest.
+
+        :returns: a 2-tuple: a dict from the transcriptions found to their
+            ``(Parse, candidates)`` pairs and the list of the others. The parses
+            are rebuilt from their triplets by the parser (see
+            ``get_parse_objects``); parses that failed are ``RemoteParse``
+            instances whose ``parse`` is ``None``.
+
+        """
+
+        path = self.get_parse_table_path(parser, max_candidates, truncate)
+        if not os.path.isfile(path):
+            return {}, transcriptions
+        table = ParseTable(path)
+        try:
+            found = {}
+            unknown = []
+            for transcription in transcriptions:
+                entry = table.get(transcription)
+                if entry is None:
+                    unknown.append(transcription)
+                else:
+                    found[transcription] = entry
+        finally:
+            table.close()
+        log.info(u'Parse table of parser %s: %d of %d words found.' % (
+            parser['id'], len(found), len(transcriptions)))
+        triplets = set()
+        for triplet, candidates in found.itervalues():
+            triplets.update(tuple(candidate) for candidate in candidates)
+            if triplet:
+                triplets.add(tuple(triplet))
+        triplets = list(triplets)
+        parse_objects = dict(zip(triplets, self.get_parse_objects(parser, map(list, triplets))))
+        no_parse = RemoteParse(None, None, [])
+        for transcription, (triplet, candidates) in found.iteritems():
+            found[transcription] = (
+                triplet and parse_objects[tuple(triplet)] or no_parse,
+                [parse_objects[tuple(candidate)] for candidate in candidates])
+        return found, unknown
+
+    def get_parse_objects(self, parser, triplets):
+        """Return the parse objects of the (mb, mg, cat) ``triplets``, as built by
+        the parser of ``parser``'s parse module (via the parse daemon, if the
+        researcher is connected to one).
+
+        """
+
+        if not triplets:
+            return []
+        if self.parse_daemon:
+            return self.parse_daemon.request('get_parse_objects', parser, triplets)
+        return map(self.get_parse_module(parser).parser.get_parse_object, triplets)
+
+    def iter_parse_in_parallel(self, parser, transcriptions, max_candidates, batch_size=0,
+                               workers=2, truncate=False, time_budget=None, candidate_limit=None):
+        """Parse ``transcriptions`` with a pool of ``workers`` processes and yield
+        a ``{transcription: (Parse, candidates)}`` dict per shard, as each
+        shard is parsed.
+
+        Each worker loads the parser once (when the pool is forked after the
+        parent has loaded it, the worker simply inherits it) and then parses
+        shards of ``batch_size`` transcriptions (by default, enough shards
+        for each worker to get four). The transcriptions are handed to the
+        workers as a shared ``StringTable`` and each shard as a pair of
+        offsets into it, so fan-out costs the same whatever the corpus size.
+        Each worker enforces the ``time_budget`` and ``candidate_limit`` of
+        its shards; see ``parse_batch``.
+
+        Since the parse module is loaded in the parent under the same unique
+        name as in the workers, the ``Parse`` objects returned by the workers
+        unpickle as instances of the parent's ``Parse`` class.
+
+        """
+
+        n = len(transcriptions)
+        table = self.share_transcriptions(transcriptions)
+        shard_size = batch_size or max(1, -(-n // (workers * 4)))
+        shards = [(table, start, min(start + shard_size, n), max_candidates, truncate,
+                   time_budget, candidate_limit) for start in xrange(0, n, shard_size)]
+        log.info(u'Parsing %d transcriptions in %d shards with %d processes.' % (
+            n, len(shards), workers))
+        pool = Pool(workers, init_parse_worker, (parser,))
+        try:
+            for shard_parsed in pool.imap_unordered(parse_shard, shards):
+                yield shard_parsed
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            table.remove()
+
+    # The parse modules loaded in this process, keyed by parser directory; values
+    # are (fingerprint, module) pairs. Shared by all researchers.
+    parse_modules = {}
+    parse_modules_lock = threading.RLock()
+
+    @classmethod
+    def get_parser_fingerprint(cls, parser):
+        """Return a fingerprint of the locally saved parser, i.e., a hash of the
+        path, size and modification time of the export archive it was unzipped
+        from (see ``save_parser_locally``), or of its ``parse.py`` if there is
+        no archive.
+
+        The files inside the archive directory are not used because the parser
+        may write its own caches there.
+
+        """
+
+        parser_dir = os.path.abspath(parser['local_copy_path'])
+        archive_path = os.path.join(os.path.dirname(parser_dir), 'archive.zip')
+        if not os.path.isfile(archive_path):
+            archive_path = os.path.join(parser_dir, 'parse.py')
+        stat = os.stat(archive_path)
+        return hashlib.sha1(repr((archive_path, stat.st_size, stat.st_mtime))).hexdigest()
+
+    @classmethod
+    def get_parse_module(cls, parser):
         """Return the imported-as-module executable ``lib/parse.py``.
 
+        Each parser is loaded once per process: the module is cached under the
+        parser's directory and reloaded only if the fingerprint of its files
+        has changed (e.g., because the parser was exported again). Each module
+        gets a name unique to its directory and fingerprint, so that modules
+        of different parsers do not clobber one another in ``sys.modules``.
+
+        """
+
+        parser_dir = os.path.abspath(parser['local_copy_path'])
+        fingerprint = cls.get_parser_fingerprint(parser)
+        with cls.parse_modules_lock:
+            cached = cls.parse_modules.get(parser_dir)
+            if cached and cached[0] == fingerprint:
+                return cached[1]
+            if cached:
+                cls.evict_parse_module(parser)
+            module_name = 'parse_module_%s' % hashlib.sha1(
+                '%s:%s' % (parser_dir.encode('utf8'), fingerprint)).hexdigest()[:16]
+            parse_module_path = os.path.join(parser_dir, 'parse.py')
+            log.info(u'Loading parse module of parser %s.' % parser.get('id', parser_dir))
+            parse_module = imp.load_source(module_name, parse_module_path)
+            cls.parse_modules[parser_dir] = (fingerprint, parse_module)
+            return parse_module
+
+    @classmethod
+    def evict_parse_module(cls, parser=None):
+        """Remove the parse module of ``parser`` (or of all parsers, if none is
+        given) from the cache, so that it is loaded again on next use.
+
         """
 
-        parser_dir = parser['local_copy_path']
-        parse_module_path = os.path.join(parser_dir, 'parse.py')
-        return imp.load_source('archive', parse_module_path)
+        with cls.parse_modules_lock:
+            if parser is None:
+                parser_dirs = cls.parse_modules.keys()
+            else:
+                parser_dirs = [os.path.abspath(parser['local_copy_path'])]
+            for parser_dir in parser_dirs:
+                cached = cls.parse_modules.pop(parser_dir, None)
+                if cached:
+                    sys.modules.pop(cached[1].__name__, None)
 
-    def phonologize_locally(self, parser, morpheme_sequences):
+    def phonologize_locally(self, parser, morpheme_sequences, use_cache=True):
         """Return the locally stored phonology's phonologizations (apply up) ``morpheme_sequences``.
 
+        :param bool use_cache: if ``True``, phonologizations are memoized by
+            the phonology's fingerprint (see ``get_applydown_cache``), so only
+            morpheme sequences never phonologized by the same phonology are
+            sent to the transducer.
+
+        """
+
+        if self.parse_daemon:
+            applydown = lambda inputs: self.parse_daemon.applydown(parser, inputs)
+        else:
+            applydown = lambda inputs: self.get_parse_module(parser).phonology.applydown(inputs)
+        if not use_cache:
+            return applydown(morpheme_sequences)
+        cache = self.get_applydown_cache(parser)
+        try:
+            phonologizations = cache.apply(set(morpheme_sequences), applydown)
+        finally:
+            cache.close()
+        log.debug(u'Phonology apply-down cache: %(hits)d hits, %(misses)d misses.' % cache.stats)
+        return phonologizations
+
+    def get_applydown_cache(self, parser, persist=True):
+        """Return the ``ApplyCache`` of the phonology of ``parser``. The caller is
+        responsible for closing it.
+
+        The cache is keyed by the phonology's fingerprint (see
+        ``get_phonology_fingerprint``), so all parsers that share a compiled
+        phonology share its phonologizations, in memory and, if ``persist`` is
+        ``True``, on disk in ``localstore/phonologies/applydown_cache``.
+
+        """
+
+        fingerprint = self.get_phonology_fingerprint(parser)
+        path = None
+        if persist:
+            cache_dir = os.path.join(self.localstore, 'phonologies', 'applydown_cache')
+            self.make_directory_safely(cache_dir)
+            path = os.path.join(cache_dir, fingerprint)
+        return ApplyCache(fingerprint, path)
+
+    @classmethod
+    def get_phonology_fingerprint(cls, parser):
+        """Return a fingerprint of the compiled phonology of ``parser``, i.e.,
+        the phonology's ``compile_attempt`` value if the parser dict has it, or
+        else a hash of the phonology files of the local export; failing both,
+        the fingerprint of the parser itself.
+
+        """
+
+        phonology = parser.get('phonology')
+        if isinstance(phonology, dict) and phonology.get('compile_attempt'):
+            return hashlib.sha1(repr(('phonology', phonology['compile_attempt']))).hexdigest()
+        parser_dir = os.path.abspath(parser['local_copy_path'])
+        digest = hashlib.sha1('phonology')
+        file_names = sorted(name for name in os.listdir(parser_dir)
+                            if name.startswith('phonology'))
+        if not file_names:
+            return cls.get_parser_fingerprint(parser)
+        for file_name in file_names:
+            path = os.path.join(parser_dir, file_name)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    digest.update(file_name)
+                    digest.update(f.read())
+        return digest.hexdigest()
+
+    def get_shared_path(self, extension):
+        """Return a new, unique path in the localstore's ``shared`` directory.
+
+        """
+
+        fd, path = tempfile.mkstemp('.%s' % extension, '',
+                                    os.path.join(self.localstore, 'shared'))
+        os.close(fd)
+        return path
+
+    def share_transcriptions(self, transcriptions):
+        """Return a ``StringTable`` of ``transcriptions`` for worker processes.
+
+        The table is a memory-mapped file that workers attach to by path, so
+        passing it to a process pool costs the same whatever its size. The
+        caller must delete it with its ``remove`` method when the workers are
+        done with it.
+
+        """
+
+        return StringTable.create(self.get_shared_path('strings'), transcriptions)
+
+    def share_corpus(self, corpus_list):
+        """Return a ``SharedCorpus`` of the (tr, mb, mg, cat) words of
+        ``corpus_list``, i.e., a shared-memory corpus list and corpus dict for
+        worker processes; see ``share_transcriptions``.
+
+        """
+
+        return SharedCorpus.create(self.get_shared_path('corpus'), corpus_list)
+
+    def clear_shared(self):
+        """Delete all files in the localstore's ``shared`` directory, e.g., those
+        left behind by interrupted runs. Do not call this while worker
+        processes are using shared tables.
+
         """
 
-        return self.get_parse_module(parser).phonology.applydown(morpheme_sequences)
+        shared_path = os.path.join(self.localstore, 'shared')
+        for file_name in os.listdir(shared_path):
+            os.remove(os.path.join(shared_path, file_name))
+
+    # Identifies the behaviour of ``clean_transcription``; subclasses that
+    # override it must change this too (e.g., to their ``Normalizer``'s version).
+    clean_version = u'identity'
 
     def clean_transcription(self, transcription):
         """This method cleans transcriptions of certain characters. It will probably be
@@ -646,6 +2162,57 @@ class ParserResearcher(object):
         """
         return transcription
 
+    def clean_transcriptions(self, transcriptions):
+        """Return the list of the cleaned versions of ``transcriptions``.
+
+        Subclasses that clean with a ``Normalizer`` should override this to use
+        its ``normalize_all`` method.
+
+        """
+        return map(self.clean_transcription, transcriptions)
+
+    def benchmark_cleaning(self, corpus, repeat=3):
+        """Measure the throughput (in tokens per second) of cleaning the
+        transcriptions of the word tokens of the locally saved ``corpus``.
+
+        :param int repeat: each rate is the best of this many runs.
+        :returns: a dict from ``'per_token'`` (``clean_transcription`` on each
+            token) and ``'batch'`` (``clean_transcriptions`` on all tokens) to
+            tokens per second. If ``self.normalize`` is a ``Normalizer``,
+            ``'unmemoized'`` and ``'cold'`` (per token, with the memo emptied
+            first) are measured too, and all outputs are checked to agree.
+
+        """
+
+        transcriptions = [word[0] for word in self.get_corpus_word_tokens(corpus)]
+        normalizer = getattr(self, 'normalize', None)
+        if not isinstance(normalizer, Normalizer):
+            normalizer = None
+        def measure(function, reset=None):
+            best = None
+            for i in xrange(repeat):
+                if reset:
+                    reset()
+                start_time = time.time()
+                outputs = function(transcriptions)
+                seconds = max(time.time() - start_time, 1e-6)
+                best = min(best or seconds, seconds)
+            return len(transcriptions) / best, outputs
+        rates = {}
+        rates['per_token'], expected = measure(lambda ts: map(self.clean_transcription, ts))
+        rates['batch'], outputs = measure(self.clean_transcriptions)
+        assert outputs == expected
+        if normalizer:
+            rates['unmemoized'], outputs = measure(lambda ts: map(normalizer.normalize, ts))
+            assert outputs == expected
+            rates['cold'], outputs = measure(lambda ts: map(self.clean_transcription, ts),
+                                             normalizer.memo.clear)
+            assert outputs == expected
+        log.info(u'Cleaning of %d tokens of corpus "%s": %s.' % (
+            len(transcriptions), corpus['name'], u', '.join(
+                u'%s %0.1f tokens/s' % (name, rate) for name, rate in sorted(rates.items()))))
+        return rates
+
     def inspect_parses(self, parser, parses, corpus_dict, corpus_id):
         """Iterate through parses and return a dict and a set:
 
@@ -666,16 +2233,35 @@ class ParserResearcher(object):
 
         """
 
+        failures = {}
+        for item in self.iter_inspect_parses(
+                parser, ((transcription, parse, candidates) for transcription, (parse, candidates)
+                         in sorted(parses.items())), corpus_dict, corpus_id, failures):
+            pass
+        return failures['morpheme_sequences'], failures['category_sequences']
+
+    def iter_inspect_parses(self, parser, parses, corpus_dict, corpus_id, failures):
+        """Inspect a stream of parses as ``inspect_parses`` does, passing each
+        ``(transcription, parse, candidates)`` triple of ``parses`` on as it is
+        inspected, so that inspection and evaluation can share one pass over
+        the output of ``iter_parse``.
+
+        :param dict failures: receives the ``morpheme_sequences`` and
+            ``category_sequences`` values that ``inspect_parses`` returns; they
+            are complete once the stream is exhausted.
+
+        """
+
         log.info('Inspecting parses of parser "%s".' % parser['name'])
-        morpheme_sequences = {} # A dict from morpheme/delimiter sequences to lists of corresponding transcriptions
-        category_sequences = set()
+        morpheme_sequences = failures['morpheme_sequences'] = {} # A dict from morpheme/delimiter sequences to lists of corresponding transcriptions
+        category_sequences = failures['category_sequences'] = set()
         key = 'parsers'
         parser_dir = os.path.join(self.localstore, key, 'parser_%s' % parser['id'])
         file_path = os.path.join(parser_dir, 'unparsed_corpus_%s.txt' % corpus_id)
         parsed_path = os.path.join(parser_dir, 'parsed_corpus_%s.txt' % corpus_id)
         parsed_file = codecs.open(parsed_path, 'w', 'utf8')
         with codecs.open(file_path, 'w', 'utf8') as f:
-            for transcription, (parse, candidates) in sorted(parses.items()):
+            for transcription, parse, candidates in parses:
                 if not parse.parse:
                     cleaned_transcription = self.clean_transcription(transcription)
                     gold_parse = filter(None,
@@ -692,10 +2278,11 @@ class ParserResearcher(object):
                         f.write(u'%s\n' % transcription)
                 else:
                     parsed_file.write(u'%s %s\n\n' % (transcription, parse.parse))
+                yield transcription, parse, candidates
+        parsed_file.close()
 
         log.info('Saved unparsed words to %s.' % file_path)
         log.info('Saved parsed words to %s.\n\n' % parsed_path)
-        return morpheme_sequences, category_sequences
 
     def save_phonological_failures(self, parser, phonologizations, morpheme_sequences, corpus_id):
         """Write a file containing parses and their user-supplied
@@ -731,41 +2318,57 @@ class ParserResearcher(object):
                         f.write('phonology %-30s-> None\n\n' % morpheme_sequence)
         log.info('Saved phonological failures to %s.' % file_path)
 
-    def evaluate_parse(self, parses, corpus_dict, parser, vocal=False):
+    def evaluate_parse(self, parses, corpus_dict, parser, vocal=False, weights=None):
         """Evaluate a parse.
 
-        :param dict parses: keys are transcriptions, values are 2-tuples: (parser.Parse(), [c1, c2, ...]).
+        :param dict parses: keys are transcriptions, values are 2-tuples: (parser.Parse(), [c1, c2, ...]),
+            e.g., a dict or a ``CompactParses`` container; or an iterable of (transcription, parser.Parse(), [c1, c2, ...]) triples,
+            e.g., as yielded by ``iter_parse``, which is consumed incrementally.
         :param dict corpus_dict: keys are transcriptions, values are [break, gloss, category] triples (lists).
         :param class Parse: the Parse class from the parser module.
+        :param dict weights: optional; keys are cleaned transcriptions, values
+            are their token counts in the corpus, e.g., as returned by
+            ``CorpusStore.transcription_counts``. If supplied, the summary also
+            contains token-weighted (``weighted_*``) success rates.
         :returns: a dict summarizing the success of the parser on a particular corpus.
 
         """
 
-        n = len(parses)
+        if hasattr(parses, 'iteritems'):
+            parses = ((transcription, parse_object, candidates) for transcription,
+                      (parse_object, candidates) in parses.iteritems())
+        n = 0
+        weights = weights or {}
+        token_count = 0                 # sum of the weights of the parsed transcriptions
+        weighted_correctly_parsed = 0
+        weighted_candidates_generated = 0
+        weighted_morphophonology_success = 0
         correctly_parsed = 0            # correct parse was generated
         candidates_generated = 0        # at least one candidate parse was generated
         tot_candidates_generated = 0    # total number of candidates generated
         morphophonology_success = 0     # the morphophonology generated the correct parse
+        # The (transcription, gold parse) pairs of each outcome, printed (and
+        # only collected) when ``vocal`` is set.
         correct = []
         correct_mp = []
         incorrect_mp = []
         no_gen = []
+        timed_out = []                  # transcriptions given up on for exceeding a budget
         # Precision and recall; precision = correct_proposed_morphemes / total_proposed_morphemes
         # recall = correct_proposed_morphemes / total_actual_morphemes
         correct_proposed_morphemes = 0
         total_proposed_morphemes = 0
         total_actual_morphemes = 0
-        for transcription, (parse_object, candidates) in parses.iteritems():
-            cleaned_transcription = self.clean_transcription(transcription)
-            no_gold = [u'nada', u'nada', u'nada']
-            gold_parse = filter(None,
-                corpus_dict.get(transcription,
-                                corpus_dict.get(cleaned_transcription, no_gold)))
-            gold_parse_object = parser.get_parse_object(gold_parse)
+        for (transcription, parse_object, candidates, cleaned_transcription, gold_parse,
+             gold_parse_object) in self.iter_gold_parses(parses, corpus_dict, parser):
+            n += 1
+            weight = weights.get(cleaned_transcription, 1)
+            token_count += weight
             total_actual_morphemes += len(gold_parse_object.morphemes)
             tot_candidates_generated += len(candidates)
             if parse_object.parse:
                 candidates_generated += 1
+                weighted_candidates_generated += weight
                 total_proposed_morphemes += len(parse_object.morphemes)
                 # I am counting the cardinality of the set of proposed
                 # morphemes so that things aren't counted twice. Bit of
@@ -773,18 +2376,21 @@ class ParserResearcher(object):
                 correct_proposed_morphemes += len(set([m for m in parse_object.morphemes if m in gold_parse_object.morphemes]))
                 if parse_object.triplet == gold_parse:
                     correctly_parsed += 1
-                    correct.append((transcription, gold_parse))
+                    weighted_correctly_parsed += weight
+                    if vocal:
+                        correct.append((transcription, gold_parse))
                 if gold_parse in [c.triplet for c in candidates]:
                     morphophonology_success += 1
-                    if parse_object.triplet != gold_parse:
+                    weighted_morphophonology_success += weight
+                    if vocal and parse_object.triplet != gold_parse:
                         correct_mp.append((transcription, gold_parse))
                         #print u'\n\n\n'
                         #print u'%s should have been parsed as %s' % (transcription, gold_parse)
                         #print u'However, the parser returned:\n\t %s' % (parse_object.triplet),
                         #print u'\n\t'.join([unicode(c.triplet) for c in candidates])
                         #print u'\n\n\n'
-                else:
-                    incorrect_mp.append((transcription, gold_parse, candidates))
+                elif vocal:
+                    incorrect_mp.append((transcription, gold_parse))
                     #print u'\n\n\n'
                     #print u'A parse was produced but it was incorrect'
                     #print u'Furthermore, the morphophonology did not even produce the correct analysis in the candidates.'
@@ -793,7 +2399,10 @@ class ParserResearcher(object):
                     #print u'\n\t'.join([unicode(c.triplet) for c in candidates])
                     #print u'\n\n\n'
             else:
-                no_gen.append((transcription, gold_parse))
+                if getattr(parse_object, 'timed_out', False):
+                    timed_out.append(transcription)
+                if vocal:
+                    no_gen.append((transcription, gold_parse))
         if vocal:
             print 'Parse success %d/%d\n%s\n' % (len(correct), n, u'#'*80)
             print u'\n'.join('%-30s%-30s%-30s%-30s' % (tr, mb, mg, cat) for tr, (mb, mg, cat)
@@ -805,7 +2414,7 @@ class ParserResearcher(object):
 
             print '\n\nParse fail, morphophonology fail %d/%d\n%s\n' % (len(incorrect_mp), n, u'#'*80)
             print u'\n'.join('%-30s%-30s%-30s%-30s' % (tr, mb, mg, cat)
-                for tr, (mb, mg, cat), candidates
+                for tr, (mb, mg, cat)
                 in sorted(incorrect_mp, key=lambda x: x[0]))
 
             print '\n\nNo candidates %d/%d\n%s\n' % (len(no_gen), n, u'#'*80)
@@ -816,20 +2425,61 @@ class ParserResearcher(object):
         # recall = correct_proposed_morphemes / total_actual_morphemes
         precision = P = self.safe_div(correct_proposed_morphemes, total_proposed_morphemes)
         recall = R = self.safe_div(correct_proposed_morphemes, total_actual_morphemes)
-        return {
+        evaluation = {
             'attempted_count': n,
             'correctly_parsed_count': correctly_parsed,
-            'correctly_parsed': correctly_parsed / float(n),
+            'correctly_parsed': self.safe_div(correctly_parsed, n),
             'candidates_generated_count': candidates_generated,
-            'candidates_generated': candidates_generated / float(n),
+            'candidates_generated': self.safe_div(candidates_generated, n),
             'morphophonology_success_count': morphophonology_success,
-            'morphophonology_success': morphophonology_success / float(n),
+            'morphophonology_success': self.safe_div(morphophonology_success, n),
             'lm_success': self.safe_div(correctly_parsed, morphophonology_success),
             'precision': precision,
             'recall': recall,
             'f_measure': self.safe_div((2 * P * R), (P + R)),
-            'tot_candidates_generated': tot_candidates_generated 
+            'tot_candidates_generated': tot_candidates_generated,
+            'timed_out_count': len(timed_out),
+            'timed_out': sorted(timed_out)
         }
+        if weights:
+            evaluation.update({
+                'token_count': token_count,
+                'weighted_correctly_parsed': self.safe_div(weighted_correctly_parsed, token_count),
+                'weighted_candidates_generated': self.safe_div(weighted_candidates_generated, token_count),
+                'weighted_morphophonology_success': self.safe_div(weighted_morphophonology_success, token_count)
+            })
+        return evaluation
+
+    def iter_gold_parses(self, parses, corpus_dict, parser, batch_size=1000):
+        """Yield ``(transcription, parse, candidates, cleaned_transcription,
+        gold_parse, gold_parse_object)`` for each of the ``(transcription, parse,
+        candidates)`` triples of ``parses``.
+
+        The gold parse objects are built a batch of ``batch_size`` words at a
+        time: if ``parser`` has a ``get_parse_objects`` method (e.g., a
+        ``ParserProxy`` of the parse daemon), it is called once per batch,
+        instead of ``get_parse_object`` once per word.
+
+        """
+
+        no_gold = [u'nada', u'nada', u'nada']
+        get_parse_objects = getattr(parser, 'get_parse_objects', None) or \
+            (lambda triplets: map(parser.get_parse_object, triplets))
+        parses = iter(parses)
+        while True:
+            batch = []
+            for transcription, parse_object, candidates in itertools.islice(parses, batch_size):
+                cleaned_transcription = self.clean_transcription(transcription)
+                gold_parse = filter(None,
+                    corpus_dict.get(transcription,
+                                    corpus_dict.get(cleaned_transcription, no_gold)))
+                batch.append((transcription, parse_object, candidates, cleaned_transcription,
+                              gold_parse))
+            if not batch:
+                return
+            gold_parse_objects = get_parse_objects([item[-1] for item in batch])
+            for item, gold_parse_object in zip(batch, gold_parse_objects):
+                yield item + (gold_parse_object,)
 
     def safe_div(self, numer, denom):
         try:
@@ -897,24 +2547,78 @@ class ParserResearcher(object):
         #'morphophonology_success': morphophonology_success,
         #'morphophonology_success_percent': 100 * morphophonology_success / float(n),
 
-    def parse_corpus(self, parser, corpus, batch_size=0):
+    def load_corpus_list(self, corpus, sample=None):
+        """Return the list of unique (tr, mb, mg, cat) words of a locally saved corpus.
+
+        :param dict sample: if supplied, only a sample of the words is
+            returned; the dict holds the keyword arguments of
+            ``CorpusStore.sample``, e.g., ``{'size': 500, 'stratify': 'category'}``.
+            The corpus must then have a complete, non-empty local store.
+
+        """
+
+        if sample:
+            # The pickle holds no counts or form ids to sample with, so a
+            # corpus saved before stores were introduced must be saved again.
+            store = self.require_saved_corpus_store(corpus)
+            try:
+                corpus_list = store.sample(**sample)
+            finally:
+                store.close()
+            log.info(u'Using a sample of %d words of corpus "%s".' % (
+                len(corpus_list), corpus['name']))
+            return corpus_list
+        return cPickle.load(open(corpus['local_copy_path'], 'rb'))
+
+    def parse_corpus(self, parser, corpus, batch_size=0, preflight=None, sample=None,
+                     workers=1, stream=False, max_candidates=10, truncate=False, fallbacks=None,
+                     report=None, time_budget=None, candidate_limit=None, remote=False,
+                     concurrency=4, compact=False, server_compile_attempt=None):
         """Parse all of the transcriptions in the locally saved corpus using the
         locally saved parser.
 
-        NOTE: I am running the preflight function on all transcriptions in the corpus list here.
+        :param function preflight: if supplied, it is run on all transcriptions
+            in the corpus list.
+        :param dict sample: if supplied, only a sample of the corpus is parsed;
+            see ``load_corpus_list``.
+        :param int workers: the number of parsing processes; see ``parse_locally``.
+        :param bool stream: if ``True``, the parses are returned as the
+            (lazy) generator of ``iter_parse`` instead of as a dict.
+        :param int max_candidates: the candidate budget; see ``iter_parse``.
+        :param bool truncate: see ``iter_parse``.
+        :param list fallbacks: if supplied, words that fail to parse are
+            retried under these normalizations; see ``iter_parse_with_fallbacks``,
+            which also fills ``report``.
+        :param float time_budget: the seconds a word may take; see ``iter_parse``.
+        :param int candidate_limit: see ``iter_parse``.
+        :param remote: if ``True``, the OLD app's parser is used instead
+            of the locally saved one, with up to ``concurrency`` requests in
+            flight; if ``'auto'``, both are used; see ``iter_parse``.
+        :param server_compile_attempt: see ``iter_parse``.
+        :param bool compact: if ``True`` (and not ``stream``), the parses are
+            returned as a ``CompactParses`` container; see ``parse_locally``.
 
         """
-        print 'in parse_corpus in researcher.py'
 
-        corpus_list = cPickle.load(open(corpus['local_copy_path'], 'rb'))
-        corpus_list = [(preflight(t), m, g, c) for t, m, g, c in corpus_list]
-        transcriptions = list(set([t for t, m, g, c in corpus_list][:10]))
+        corpus_list = self.load_corpus_list(corpus, sample)
+        if preflight:
+            corpus_list = [(preflight(t), m, g, c) for t, m, g, c in corpus_list]
+        transcriptions = list(set([t for t, m, g, c in corpus_list]))
         log.info('About to parse all %s unique transcriptions in corpus "%s".' % (
             len(transcriptions), corpus['name']))
+        parses = self.iter_parse_with_fallbacks(parser, transcriptions, fallbacks or (), report,
+            batch_size=batch_size, workers=workers, max_candidates=max_candidates,
+            truncate=truncate, time_budget=time_budget, candidate_limit=candidate_limit,
+            remote=remote, concurrency=concurrency,
+            server_compile_attempt=server_compile_attempt)
+        if stream:
+            return parses, corpus_list
         start_time = time.time()
-        parses = self.parse_locally(parser, transcriptions, batch_size)
-        print 'This is what parse_locally returns:\n\n'
-        pprint.pprint(parses)
+        if compact:
+            parses = CompactParses.from_parses(parses, self.get_parse_string_reader(parser))
+        else:
+            parses = dict((transcription, (parse, candidates))
+                          for transcription, parse, candidates in parses)
         end_time = time.time()
         log.info('Time elapsed: %s' % self.old.human_readable_seconds(end_time - start_time))
         return parses, corpus_list
@@ -933,12 +2637,41 @@ class ParserResearcher(object):
         test_phonology = kwargs.get('test_phonology', True)
         get_phonology_success = kwargs.get('get_phonology_success', False)
         batch_size = kwargs.get('batch_size', 0)
+        workers = kwargs.get('workers', 1)
+        # The candidate budget; see ``iter_parse``. It is recorded in the summaries.
+        max_candidates = kwargs.get('max_candidates', 10)
+        truncate = kwargs.get('truncate', False)
+        # The per-word time budget; see ``iter_parse``. Words given up on are
+        # counted as failures and listed in the summaries.
+        time_budget = kwargs.get('time_budget')
+        candidate_limit = kwargs.get('candidate_limit')
+        # The remote kwarg evaluates the OLD app's parser instead of the locally
+        # saved one (e.g., one that has not been exported), with up to
+        # ``concurrency`` parse requests in flight; if it is 'auto', both are
+        # used at once (see ``iter_parse_hybrid``). The phonology is only
+        # tested if the local export is current.
+        remote = kwargs.get('remote', False)
+        concurrency = kwargs.get('concurrency', 4)
+        # The parser's compile attempt on the OLD app, requested once; it keys
+        # the cache of remote parses and tells whether the local export is
+        # current.
+        server_compile_attempt = remote and self.get_server_compile_attempt(parser) or None
+        local_available = not remote or (remote == 'auto' and self.get_local_export_status(
+            parser, server_compile_attempt) == 'current')
+        # Normalizations under which unparsed words are retried; see
+        # ``iter_parse_with_fallbacks``. The yield and cost of each pass are
+        # recorded in the summaries.
+        fallbacks = kwargs.get('fallbacks')
         force_recreate = kwargs.get('force_recreate', False)
         vocal = kwargs.get('vocal', False)
 
         # The preflight kwarg is a function that can be run on each transcription prior
         # to a parse request. In Dunham (2014), this is used to flatten prominence and length distinctions
-        preflight = kwargs.get('preflight', lambda x: x)
+        preflight = kwargs.get('preflight')
+
+        # The sample kwarg restricts the evaluation to a sample of each corpus;
+        # see ``load_corpus_list``. Summaries of samples are cached separately.
+        sample = kwargs.get('sample')
 
         # E.g., self.record['parse_summaries'][48][273] is a summary of the success of parser 48 on corpus 273
         key = 'parse_summaries'
@@ -949,60 +2682,156 @@ class ParserResearcher(object):
 
             corpus = corpora[corpus_name]
 
-            if record.get(corpus['id']) and not force_recreate:
-                parse_summaries.append(record[corpus['id']])
-                continue
-
-            # Parse the corpus of words
-            print 'In evaluate_parser_against_corpora'
-            parses, corpus_list = self.parse_corpus(parser, corpus, batch_size, preflight)
-            corpus_dict = dict((self.clean_transcription(t), [b, g, c]) for t, b, g, c in corpus_list)
-
-            # Here we do stuff to try to figure out what's going wrong with the parser.
-
-            # Get the morpheme and category sequences of the words that could not be parsed;
-            # also, save unparsed transcriptions to disk.
-            # morpheme_sequences: a dict, keys are sequences of user-supplied morpheme shapes, values are the corresponding user-supplied transcriptions.
-            # category_sequences: a set of sequences of categories and delimiters corresponding to the unparsed transcriptions.
-            morpheme_sequences, category_sequences = self.inspect_parses(
-                parser, parses, corpus_dict, corpus['id'])
-
-            # ``evaluation`` is a dict holding stats about the success of the parser on the corpus
-            parser_object = self.get_parse_module(parser).parser
-            evaluation = self.evaluate_parse(parses, corpus_dict, parser_object, vocal=vocal)
-
-            if test_phonology:
-                # Map morpheme sequences to phonologizations, i.e., transcriptions.
-                # WARNING: where phonologies take gloss and category information into account, this will fail ...
-                phonologizations = self.phonologize_locally(parser, morpheme_sequences.keys())
-
-                # Write phonological failures to disk.
-                self.save_phonological_failures(parser, phonologizations, morpheme_sequences, corpus['id'])
-
-            if get_phonology_success:
-                phonology_success = self.get_phonology_success(parser, corpus_list)
-                evaluation.update(phonology_success)
-
-            name_list = corpus_name.split()
-            type_ = (('well' in name_list and 'well') or
-                     ('analyzed' in name_list and 'analyzed') or
-                     'words')
-            relation, entity = (
-                ('elicitor' in name_list and ('elicitor', name_list[name_list.index('elicitor') + 3])) or
-                ('enterer' in name_list and ('enterer', name_list[name_list.index('enterer') + 3])) or
-                ('dialect' in name_list and ('dialect', name_list[name_list.index('dialect') + 2])) or
-                ('speaker' in name_list and ('speaker', name_list[name_list.index('speaker') + 3])) or
-                ('id' in name_list and ('source', str(name_list[name_list.index('id') + 2]))) or
-                ('source' in name_list and ('source', name_list[name_list.index('source') + 4])) or
-                ('all', ''))
-            evaluation.update({
-                'type': type_,
-                'relation': relation,
-                'entity': entity,
-                'id': corpus['id']
-            })
-            parse_summaries.append(evaluation)
-            record[corpus['id']] = evaluation
+            weights = None
+            # Only a complete, non-empty store is used; otherwise (e.g., a
+            # corpus saved before stores existed, or an interrupted save) the
+            # gold standard is built from the pickled word list.
+            store = self.open_saved_corpus_store(corpus['local_copy_path'])
+            if store is None:
+                log.info(u'Corpus "%s" has no complete local store; using its pickled'
+                         u' word list.' % corpus_name)
+            try:
+                options = {}
+                if sample:
+                    options['sample'] = tuple(sorted(sample.items()))
+                if (max_candidates, truncate) != (10, False):
+                    options.update({'max_candidates': max_candidates, 'truncate': truncate})
+                if time_budget or candidate_limit:
+                    options.update({'time_budget': time_budget, 'candidate_limit': candidate_limit})
+                if remote:
+                    options['remote'] = remote
+                if fallbacks:
+                    options['fallbacks'] = tuple(isinstance(f, basestring) and f or f[0]
+                                                 for f in fallbacks)
+                summary_key = options and (corpus['id'], tuple(sorted(options.items()))) or corpus['id']
+                summary = record.get(summary_key)
+                if summary and not force_recreate:
+                    # A cached summary is stale only if the words of the corpus
+                    # or the cleaning of their transcriptions have changed
+                    # since it was made.
+                    if summary.get('clean_version') not in (None, self.clean_version):
+                        log.info(u'The transcription cleaning has changed; re-evaluating'
+                                 u' corpus "%s".' % corpus_name)
+                        summary = None
+                    elif store and summary.get('corpus_revision') not in (None, store.revision):
+                        diff = store.diff(summary.get('corpus_revision'))
+                        if diff is not None and not any(diff.values()):
+                            summary['corpus_revision'] = store.revision
+                        else:
+                            if diff:
+                                log.info(u'Corpus "%s" has changed (%d words added, %d removed, %d'
+                                    u' recounted); re-evaluating.' % (corpus_name,
+                                    len(diff['added']), len(diff['removed']), len(diff['changed'])))
+                            summary = None
+                    if summary:
+                        parse_summaries.append(summary)
+                        continue
+
+                # Parse the corpus of words
+                print 'In evaluate_parser_against_corpora'
+                # The parses are streamed: nothing is parsed until evaluate_parse
+                # consumes them, and they are inspected and evaluated in one pass.
+                parse_passes = []
+                parses, corpus_list = self.parse_corpus(parser, corpus, batch_size, preflight, sample,
+                                                        workers, stream=True,
+                                                        max_candidates=max_candidates,
+                                                        truncate=truncate,
+                                                        fallbacks=fallbacks, report=parse_passes,
+                                                        time_budget=time_budget,
+                                                        candidate_limit=candidate_limit,
+                                                        remote=remote, concurrency=concurrency,
+                                                        server_compile_attempt=server_compile_attempt)
+                if store:
+                    if not store.meta['indexed']:
+                        store.build_indexes()
+                        store.save()
+                    # Token counts of the (cleaned) transcriptions, for frequency-weighted evaluation.
+                    normalize = preflight and (lambda t: self.clean_transcription(preflight(t))) or \
+                        self.clean_transcription
+                    weights = store.transcription_counts(normalize)
+                if store and preflight is None:
+                    # Use the persistent index of the corpus' store instead of building a dict.
+                    corpus_dict = CorpusDict(store)
+                else:
+                    corpus_dict = dict((self.clean_transcription(t), [b, g, c])
+                                       for t, b, g, c in corpus_list)
+
+                # Here we do stuff to try to figure out what's going wrong with the parser.
+
+                # Get the morpheme and category sequences of the words that could not be parsed;
+                # also, save unparsed transcriptions to disk.
+                # morpheme_sequences: a dict, keys are sequences of user-supplied morpheme shapes, values are the corresponding user-supplied transcriptions.
+                # category_sequences: a set of sequences of categories and delimiters corresponding to the unparsed transcriptions.
+                failures = {}
+                parses = self.iter_inspect_parses(parser, parses, corpus_dict, corpus['id'], failures)
+
+                # ``evaluation`` is a dict holding stats about the success of the parser on the corpus
+                if remote:
+                    parser_object = self.get_parse_string_reader(parser)
+                elif self.parse_daemon:
+                    parser_object = self.parse_daemon.get_parser_proxy(parser)
+                else:
+                    parser_object = self.get_parse_module(parser).parser
+                evaluation = self.evaluate_parse(parses, corpus_dict, parser_object, vocal=vocal,
+                                                 weights=weights)
+                if remote:
+                    # Remote parses have no candidates, so the success of the
+                    # morphophonology and of the language model cannot be told
+                    # apart; these rates are not applicable (None).
+                    for name in ('morphophonology_success_count', 'morphophonology_success',
+                                 'lm_success', 'weighted_morphophonology_success',
+                                 'tot_candidates_generated'):
+                        if name in evaluation:
+                            evaluation[name] = None
+                morpheme_sequences = failures['morpheme_sequences']
+                category_sequences = failures['category_sequences']
+
+                if not local_available and (test_phonology or get_phonology_success):
+                    log.info(u'The phonology is not tested without a current local export.')
+                elif test_phonology:
+                    # Map morpheme sequences to phonologizations, i.e., transcriptions.
+                    # WARNING: where phonologies take gloss and category information into account, this will fail ...
+                    phonologizations = self.phonologize_locally(parser, morpheme_sequences.keys())
+
+                    # Write phonological failures to disk.
+                    self.save_phonological_failures(parser, phonologizations, morpheme_sequences, corpus['id'])
+
+                if get_phonology_success and local_available:
+                    phonology_success = self.get_phonology_success(parser, corpus_list)
+                    evaluation.update(phonology_success)
+
+                name_list = corpus_name.split()
+                type_ = (('well' in name_list and 'well') or
+                         ('analyzed' in name_list and 'analyzed') or
+                         'words')
+                relation, entity = (
+                    ('elicitor' in name_list and ('elicitor', name_list[name_list.index('elicitor') + 3])) or
+                    ('enterer' in name_list and ('enterer', name_list[name_list.index('enterer') + 3])) or
+                    ('dialect' in name_list and ('dialect', name_list[name_list.index('dialect') + 2])) or
+                    ('speaker' in name_list and ('speaker', name_list[name_list.index('speaker') + 3])) or
+                    ('id' in name_list and ('source', str(name_list[name_list.index('id') + 2]))) or
+                    ('source' in name_list and ('source', name_list[name_list.index('source') + 4])) or
+                    ('all', ''))
+                evaluation.update({
+                    'type': type_,
+                    'relation': relation,
+                    'entity': entity,
+                    'id': corpus['id'],
+                    'corpus_revision': store and store.revision,
+                    'clean_version': self.clean_version,
+                    'sample': sample,
+                    'max_candidates': max_candidates,
+                    'truncate': truncate,
+                    'time_budget': time_budget,
+                    'candidate_limit': candidate_limit,
+                    'remote': remote,
+                    'parse_passes': parse_passes
+                })
+                parse_summaries.append(evaluation)
+                record[summary_key] = evaluation
+            finally:
+                if store:
+                    store.close()
             # relation, (attribute, value) in relations.items():
 
         # Cache and return the summaries
@@ -1055,3 +2884,296 @@ class ParserResearcher(object):
         categories = self.old.get('syntacticcategories')
         return dict((c['name'], c) for c in categories)
 
+
+# State of a parse worker process; see ``ParserResearcher.iter_parse_in_parallel``.
+parse_worker = {}
+
+def init_parse_worker(parser):
+    """Load the parser of a parse worker process, once per process.
+
+    """
+
+    parse_worker['parse_module'] = ParserResearcher.get_parse_module(parser)
+
+def parse_shard(shard):
+    """Parse the transcriptions ``table[start:end]`` of a ``shard``, i.e., a
+    ``(table, start, end, max_candidates, truncate, time_budget, candidate_limit)``
+    tuple, in a parse worker process. See ``ParserResearcher.iter_parse_in_parallel``.
+
+    """
+
+    table, start, end, max_candidates, truncate, time_budget, candidate_limit = shard
+    try:
+        return parse_batch(parse_worker['parse_module'], table[start:end], max_candidates, truncate,
+                           time_budget, candidate_limit)
+    finally:
+        table.close()
+
+def parse_batch(parse_module, transcriptions, max_candidates=10, truncate=False,
+                time_budget=None, candidate_limit=None):
+    """Return the parses of ``transcriptions`` by the parser of ``parse_module``,
+    with at most ``max_candidates`` candidates per transcription.
+
+    Without ``truncate``, the budget only limits the candidates returned: the
+    language model ranks every candidate that the morphophonology proposes.
+    With ``truncate``, the candidates of each transcription are truncated to
+    the first ``max_candidates`` (in the order the transducer outputs them)
+    before they are ranked. This is candidate truncation, not a time bound:
+    it bounds the ranking, not the apply-up. The transducer (``flookup``) has
+    no limit on its outputs, so the morphophonology still computes all of
+    them and an overgenerating phonology costs as much time in the
+    transducer as before; only the ``time_budget`` bounds that. Parse modules
+    whose parser has no ``morphophonology.applyup`` are parsed without
+    truncation.
+
+    :param float time_budget: if supplied, the number of seconds each
+        transcription may take; see ``parse_within_budget``.
+    :param int candidate_limit: if supplied, the maximum number of candidates
+        the morphophonology may propose for a transcription; see
+        ``parse_within_candidate_limit``.
+
+    """
+
+    if time_budget:
+        return parse_within_budget(parse_module, transcriptions, max_candidates, truncate,
+                                   time_budget, candidate_limit)
+    if candidate_limit:
+        return parse_within_candidate_limit(parse_module, transcriptions, max_candidates,
+                                            truncate, candidate_limit)
+    return parse_batch_unbounded(parse_module, transcriptions, max_candidates, truncate)
+
+def parse_batch_unbounded(parse_module, transcriptions, max_candidates=10, truncate=False,
+                          candidate_limit=None):
+    parser = parse_module.parser
+    morphophonology = getattr(parser, 'morphophonology', None)
+    max_outputs = truncate and max_candidates or None
+    if not ((max_outputs or candidate_limit) and getattr(morphophonology, 'applyup', None)):
+        return parser.parse(transcriptions, parse_objects=True, max_candidates=max_candidates)
+    # The limits are given to a shallow copy of the parser, so that the parser
+    # shared by other threads (e.g., of a parse daemon) is never modified.
+    limited_parser = copy.copy(parser)
+    limited_parser.morphophonology = CandidateLimiter(morphophonology, max_outputs,
+                                                      candidate_limit)
+    return limited_parser.parse(transcriptions, parse_objects=True,
+                                max_candidates=max_candidates)
+
+def parse_within_candidate_limit(parse_module, transcriptions, max_candidates=10,
+                                 truncate=False, candidate_limit=None):
+    """Parse ``transcriptions`` as ``parse_batch`` does, giving up on those for
+    which the morphophonology proposes more than ``candidate_limit``
+    candidates.
+
+    The limit is checked once the morphophonology has applied up the whole
+    batch (see ``CandidateLimiter``), so it bounds the candidates that are
+    ranked, not the time spent in the transducer; that is bounded by the
+    ``time_budget`` of ``parse_within_budget``. A batch that exceeds the
+    limit is split in two until the transcriptions that exceed it on their
+    own are isolated; each of them is returned as a ``ParseTimeout`` with no
+    candidates.
+
+    """
+
+    try:
+        return parse_batch_unbounded(parse_module, transcriptions, max_candidates, truncate,
+                                     candidate_limit)
+    except ParseBudgetExceeded, e:
+        if len(transcriptions) == 1:
+            log.warn(u'Gave up parsing %s: %s.' % (transcriptions[0], e))
+            return {transcriptions[0]: (ParseTimeout(unicode(e)), [])}
+    middle = len(transcriptions) // 2
+    parses = parse_within_candidate_limit(parse_module, transcriptions[:middle],
+                                          max_candidates, truncate, candidate_limit)
+    parses.update(parse_within_candidate_limit(parse_module, transcriptions[middle:],
+                                               max_candidates, truncate, candidate_limit))
+    return parses
+
+def parse_within_budget(parse_module, transcriptions, max_candidates=10, truncate=False,
+                        time_budget=None, candidate_limit=None):
+    """Parse ``transcriptions`` as ``parse_batch`` does, giving up on any
+    transcription that takes more than ``time_budget`` seconds.
+
+    The transcriptions are parsed one at a time by a child process (see
+    ``ParseProcess``), which sends back the parses of each as soon as it is
+    done. If a transcription is not parsed within ``time_budget`` seconds,
+    the child and its transducer subprocesses (e.g., ``flookup``) are killed,
+    the transcription is returned as a ``ParseTimeout`` with no candidates
+    and a new child parses the rest. A pathological transcription thus costs
+    ``time_budget`` seconds and never stalls the rest.
+
+    The parser of the calling process is never interrupted, so its state is
+    left intact, and the budget is enforced in any thread (e.g., the request
+    threads of a parse daemon) as well as in parse worker processes. The
+    price is that the transducers are run once per transcription instead of
+    once per batch.
+
+    Transcriptions for which the morphophonology proposes more than
+    ``candidate_limit`` candidates are given up on, too.
+
+    """
+
+    parses = {}
+    position = 0
+    while position < len(transcriptions):
+        process = ParseProcess(parse_module, transcriptions, position, max_candidates, truncate,
+                               candidate_limit)
+        try:
+            for transcription in transcriptions[position:]:
+                parsed = process.receive(time_budget)
+                position += 1
+                if parsed is None:
+                    reason = u'more than %0.2fs' % time_budget
+                    log.warn(u'Gave up parsing %s: %s.' % (transcription, reason))
+                    parses[transcription] = (ParseTimeout(reason), [])
+                    break
+                for word, (parse, candidates) in parsed.iteritems():
+                    if getattr(parse, 'timed_out', False):
+                        log.warn(u'Gave up parsing %s: %s.' % (word, parse.reason))
+                parses.update(parsed)
+        finally:
+            process.stop()
+    return parses
+
+
+class ParseProcess(object):
+    """A child process, forked from the current one, that parses
+    ``transcriptions[position:]`` one at a time with the parser of
+    ``parse_module`` (inherited from the parent, so not loaded again) and
+    sends the parses of each back through a pipe. See ``parse_within_budget``.
+
+    The child leads a process group of its own, so that ``stop`` can kill it
+    together with the transducer subprocesses it has started.
+
+    """
+
+    def __init__(self, parse_module, transcriptions, position=0, max_candidates=10,
+                 truncate=False, candidate_limit=None):
+        self.receiver, sender = Pipe(duplex=False)
+        self.pid = os.fork()
+        if not self.pid:
+            self.receiver.close()
+            self.run(sender, parse_module, transcriptions, position, max_candidates, truncate,
+                     candidate_limit)
+        sender.close()
+        try:
+            # Also set by the child; whichever runs first wins the race.
+            os.setpgid(self.pid, self.pid)
+        except OSError:
+            pass
+
+    @staticmethod
+    def run(sender, parse_module, transcriptions, position, max_candidates, truncate,
+            candidate_limit):
+        try:
+            os.setpgid(0, 0)
+            for transcription in transcriptions[position:]:
+                try:
+                    parsed = parse_batch_unbounded(parse_module, [transcription],
+                                                   max_candidates, truncate, candidate_limit)
+                except ParseBudgetExceeded, e:
+                    parsed = {transcription: (ParseTimeout(unicode(e)), [])}
+                sender.send((parsed, None))
+        except Exception, e:
+            try:
+                sender.send((None, u'%s: %s' % (e.__class__.__name__, e)))
+            except Exception:
+                pass
+        finally:
+            # Never return into the parent's code (or run its exit handlers).
+            os._exit(0)
+
+    def receive(self, timeout=None):
+        """Return the parses of the next transcription, or ``None`` (after
+        killing the child) if they are not received within ``timeout`` seconds.
+
+        """
+
+        if not self.receiver.poll(timeout):
+            self.kill()
+            return None
+        try:
+            parsed, error = self.receiver.recv()
+        except EOFError:
+            error = u'the parse process exited unexpectedly'
+        if error:
+            raise Exception(u'Parse process failed: %s' % error)
+        return parsed
+
+    def kill(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def stop(self):
+        """Kill the child and its subprocesses, if they are still running, and
+        reap the child.
+
+        """
+
+        self.kill()
+        self.receiver.close()
+        try:
+            os.waitpid(self.pid, 0)
+        except OSError:
+            pass
+
+
+class ParseBudgetExceeded(Exception):
+    pass
+
+
+class CandidateLimiter(object):
+    """A stand-in for a parser's ``morphophonology`` whose ``applyup`` returns
+    at most ``max_outputs`` outputs per input (the first ones the transducer
+    outputs) and raises ``ParseBudgetExceeded`` if the transducer outputs more
+    than ``candidate_limit`` for any input. Its other attributes are those of
+    the morphophonology.
+
+    Both limits are applied to the outputs of a complete apply-up, so they
+    bound the candidates that are ranked, not the work of the transducer.
+
+    """
+
+    def __init__(self, morphophonology, max_outputs=None, candidate_limit=None):
+        self.morphophonology = morphophonology
+        self.max_outputs = max_outputs
+        self.candidate_limit = candidate_limit
+
+    def applyup(self, *args, **kwargs):
+        result = self.morphophonology.applyup(*args, **kwargs)
+        if not isinstance(result, dict):
+            return result
+        if self.candidate_limit and any(len(outputs) > self.candidate_limit
+                                        for outputs in result.itervalues()):
+            raise ParseBudgetExceeded(u'more than %d candidates' % self.candidate_limit)
+        if self.max_outputs:
+            return dict((input_, outputs[:self.max_outputs])
+                        for input_, outputs in result.iteritems())
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.morphophonology, name)
+
+
+class ParseTimeout(object):
+    """The result of a transcription whose parse was given up on by
+    ``parse_within_budget`` or ``parse_within_candidate_limit``. Like a failed
+    parse, its ``parse`` is ``None``; ``reason`` says which budget was exceeded.
+
+    """
+
+    __slots__ = ('reason',)
+
+    timed_out = True
+    parse = None
+    triplet = None
+    morphemes = ()
+
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __getstate__(self):
+        return self.reason
+
+    def __setstate__(self, state):
+        self.reason = state
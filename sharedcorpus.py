@@ -0,0 +1,241 @@
+#!/home/joel/env/bin/python
+# coding=utf8
+
+# Copyright 2013 Joel Dunham
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Shared Corpus --- read-only string tables that worker processes share.
+
+The classes defined here lay a list of strings out in a single memory-mapped
+file: a string table and its offsets. Any number of processes can map the
+same file and read the strings out of the shared pages, so handing a corpus to
+a pool of workers means sending them the path to its file, not the corpus
+itself. A table pickles as its path, so it can be passed directly as an
+argument of ``multiprocessing`` pool methods. Tables are closed by ``close``
+(or on leaving a ``with`` block) and deleted by whoever created them with
+``remove``.
+
+"""
+
+import bisect
+import errno
+import mmap
+import os
+import struct
+
+
+class StringTable(object):
+    """A read-only sequence of unicode strings (or ``None`` values) in a
+    memory-mapped file.
+
+    The file holds the number of strings ``n``, then ``n + 1`` offsets, then
+    the strings themselves, each encoded as UTF-8 behind a one-byte flag that
+    distinguishes ``None`` from the empty string.
+
+    :param str path: the path to a file written by ``StringTable.create``.
+
+    """
+
+    header = struct.Struct('<q')
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.length = self.header.unpack_from(self.buffer, 0)[0]
+        self.offsets = struct.Struct('<%dq' % (self.length + 1))
+        self.data_start = self.header.size + self.offsets.size
+
+    @classmethod
+    def create(cls, path, strings):
+        """Write ``strings`` to a new table at ``path`` and return the table.
+
+        The file is written to a temporary path first and then renamed, so
+        that processes never attach to a partially written table.
+
+        """
+
+        encoded = [s is None and '\x00' or '\x01' + s.encode('utf8') for s in strings]
+        offsets = [0]
+        for s in encoded:
+            offsets.append(offsets[-1] + len(s))
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.header.pack(len(encoded)))
+            f.write(struct.pack('<%dq' % len(offsets), *offsets))
+            f.write(''.join(encoded))
+        os.rename(tmp_path, path)
+        return cls(path)
+
+    def __reduce__(self):
+        return (self.__class__, (self.path,))
+
+    def __len__(self):
+        return self.length
+
+    def get_offsets(self, index):
+        return struct.unpack_from('<2q', self.buffer,
+                                  self.header.size + 8 * index)
+
+    def get_bytes(self, index):
+        """Return the flagged UTF-8 bytes of the string at ``index``.
+
+        """
+
+        start, end = self.get_offsets(index)
+        return self.buffer[self.data_start + start:self.data_start + end]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('string table index out of range')
+        value = self.get_bytes(index)
+        if value == '\x00':
+            return None
+        return value[1:].decode('utf8')
+
+    def __iter__(self):
+        for index in xrange(self.length):
+            yield self[index]
+
+    def close(self):
+        self.buffer.close()
+
+    def remove(self):
+        """Close the table and delete its file. Processes that have it open
+        can go on reading it until they close it.
+
+        """
+
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SharedCorpus(object):
+    """A read-only, shared copy of a list of (tr, mb, mg, cat) words.
+
+    The words are sorted by transcription and laid out four strings at a time
+    in a ``StringTable``, so a worker can both iterate over the corpus and use
+    it as a ``corpus_dict`` (i.e., map transcriptions to [mb, mg, cat] lists),
+    the latter by binary search over the shared table. The sort is stable and
+    by transcription only, so the analyses of a transcription keep their
+    order in the corpus list and, as with the ``corpus_dict`` built in
+    ``ParserResearcher.evaluate_parser_against_corpora``, the last of them
+    wins.
+
+    :param str path: the path to a file written by ``SharedCorpus.create``.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.table = StringTable(path)
+
+    @classmethod
+    def create(cls, path, corpus_list):
+        """Write ``corpus_list`` to a new shared corpus at ``path`` and return it.
+
+        """
+
+        words = sorted(corpus_list, key=lambda word: word[0].encode('utf8'))
+        strings = []
+        for word in words:
+            strings.extend(word)
+        StringTable.create(path, strings)
+        return cls(path)
+
+    def __reduce__(self):
+        return (self.__class__, (self.path,))
+
+    def __len__(self):
+        return len(self.table) // 4
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield tuple(self.table[4 * index:4 * index + 4])
+
+    def transcriptions(self):
+        """Yield the transcriptions of the corpus, in sorted order.
+
+        """
+
+        for index in xrange(len(self)):
+            yield self.table[4 * index]
+
+    def find(self, transcription):
+        """Return the index of the last word with ``transcription``, or -1.
+
+        """
+
+        key = '\x01' + transcription.encode('utf8')
+        index = bisect.bisect_right(_Transcriptions(self.table), key) - 1
+        if index >= 0 and self.table.get_bytes(4 * index) == key:
+            return index
+        return -1
+
+    def get(self, transcription, default=None):
+        index = self.find(transcription)
+        if index == -1:
+            return default
+        return self.table[4 * index + 1:4 * index + 4]
+
+    def __getitem__(self, transcription):
+        analysis = self.get(transcription)
+        if analysis is None:
+            raise KeyError(transcription)
+        return analysis
+
+    def __contains__(self, transcription):
+        return self.find(transcription) != -1
+
+    def close(self):
+        self.table.close()
+
+    def remove(self):
+        self.table.remove()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _Transcriptions(object):
+    """The flagged transcription bytes of a ``SharedCorpus`` table as a sequence,
+    for ``bisect``.
+
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return len(self.table) // 4
+
+    def __getitem__(self, index):
+        return self.table.get_bytes(4 * index)